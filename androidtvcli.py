@@ -0,0 +1,78 @@
+import sys
+import os
+import json
+
+CONFIG_DIR = os.path.join(os.path.expanduser("~"), "Documents", "AndroidTVController")
+DAEMON_HOST = "127.0.0.1"
+DAEMON_PORT = int(os.environ.get("ANDROIDTVCONTROLLER_DAEMON_PORT", 8765))
+DAEMON_TOKEN_FILE = os.path.join(CONFIG_DIR, "daemon.token")
+CLI_COMMANDS = ("daemon", "send", "connect", "disconnect", "status", "--port", "-h", "--help")
+
+
+def is_client_call(argv):
+    return bool(argv) and argv[0] in CLI_COMMANDS and "daemon" not in argv
+
+
+def read_daemon_token(path=DAEMON_TOKEN_FILE):
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def call_daemon(action, request=None, port=DAEMON_PORT, timeout=30):
+    import urllib.request
+    import urllib.error
+    data = json.dumps(request or {}).encode("utf-8")
+    headers = {"Content-Type": "application/json", "Authorization": f"Bearer {read_daemon_token()}"}
+    http_request = urllib.request.Request(f"http://{DAEMON_HOST}:{port}/{action}", data=data, headers=headers)
+    try:
+        with urllib.request.urlopen(http_request, timeout=timeout) as response:
+            return json.load(response)
+    except urllib.error.HTTPError as e:
+        return json.load(e)
+
+
+def run_cli(argv, daemon_factory=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="androidtvcontroller", description="Control Android TVs through the headless remote daemon.")
+    parser.add_argument("--port", type=int, default=DAEMON_PORT)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("daemon", help="run the headless daemon")
+    send = commands.add_parser("send", help="send a key or text")
+    send.add_argument("kind", choices=["key", "text"])
+    send.add_argument("value", nargs="+")
+    send.add_argument("--target", help="device IP, group name or 'all'")
+    connect = commands.add_parser("connect", help="connect to a device")
+    connect.add_argument("ip")
+    disconnect = commands.add_parser("disconnect", help="disconnect a device")
+    disconnect.add_argument("ip", nargs="?")
+    commands.add_parser("status", help="show the daemon status")
+    options = parser.parse_args(argv)
+
+    if options.command == "daemon":
+        if daemon_factory is None:
+            from androidtvcontroller import RemoteDaemon as daemon_factory
+        daemon_factory().serve(port=options.port)
+        return 0
+    if options.command == "send" and options.kind == "key":
+        request = {"key": " ".join(options.value), "target": options.target}
+    elif options.command == "send":
+        request = {"text": " ".join(options.value), "target": options.target}
+    elif options.command in ("connect", "disconnect"):
+        request = {"ip": options.ip}
+    else:
+        request = {}
+    action = options.kind if options.command == "send" else options.command
+    try:
+        result = call_daemon(action, request, options.port)
+    except OSError as e:
+        print(f"daemon not reachable on port {options.port}: {e}", file=sys.stderr)
+        return 2
+    print(json.dumps(result, indent=4))
+    return 0 if result.get("ok") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(run_cli(sys.argv[1:]))
@@ -1,11 +1,32 @@
 import sys
 import os
+import time
+STARTUP_STARTED = time.perf_counter()
+import androidtvcli
+if __name__ == "__main__" and androidtvcli.is_client_call(sys.argv[1:]):
+    sys.exit(androidtvcli.run_cli(sys.argv[1:]))
+from androidtvcli import CONFIG_DIR, DAEMON_HOST, DAEMON_PORT, DAEMON_TOKEN_FILE
+import re
 import json
+import math
+import copy
+import bisect
+import uuid
+import base64
+import hashlib
+import queue
+import socket
+import shutil
+import secrets
+import struct
+import threading
 import subprocess
-import win10toast
-from PyQt5.QtWidgets import (QApplication, QWidget, QPushButton, QVBoxLayout, QHBoxLayout, QLineEdit, QLabel, QListWidget, QListWidgetItem, QStackedLayout, QGridLayout, QFrame, QComboBox)
-from PyQt5.QtCore import (Qt, QTimer, QRectF)
-from PyQt5.QtGui import QPainter, QPen, QColor, QPainterPath
+import contextlib
+import collections
+import importlib.util
+from PyQt5.QtWidgets import (QApplication, QWidget, QPushButton, QVBoxLayout, QHBoxLayout, QLineEdit, QLabel, QListWidget, QListWidgetItem, QStackedLayout, QGridLayout, QFrame, QComboBox, QShortcut, QInputDialog)
+from PyQt5.QtCore import (Qt, QTimer, QRectF, QObject, pyqtSignal, QFileSystemWatcher, QEvent)
+from PyQt5.QtGui import QPainter, QPen, QColor, QPainterPath, QKeySequence, QImage
 from PyQt5.QtGui import QIcon
 
 KEYCODE_BACK = "KEYCODE_BACK"
@@ -20,128 +41,2356 @@ KEYCODE_DPAD_UP = "KEYCODE_DPAD_UP"
 KEYCODE_DPAD_DOWN = "KEYCODE_DPAD_DOWN"
 KEYCODE_ENTER = "KEYCODE_ENTER"
 
-class AndroidTVRemote(QWidget):
+PASSTHROUGH_KEYS = {
+    Qt.Key_Up: KEYCODE_DPAD_UP,
+    Qt.Key_Down: KEYCODE_DPAD_DOWN,
+    Qt.Key_Left: KEYCODE_DPAD_LEFT,
+    Qt.Key_Right: KEYCODE_DPAD_RIGHT,
+    Qt.Key_Return: KEYCODE_ENTER,
+    Qt.Key_Enter: KEYCODE_ENTER,
+    Qt.Key_Escape: KEYCODE_BACK,
+    Qt.Key_Backspace: "KEYCODE_DEL",
+    Qt.Key_Delete: "KEYCODE_FORWARD_DEL",
+    Qt.Key_Home: "KEYCODE_MOVE_HOME",
+    Qt.Key_End: "KEYCODE_MOVE_END",
+    Qt.Key_PageUp: "KEYCODE_PAGE_UP",
+    Qt.Key_PageDown: "KEYCODE_PAGE_DOWN",
+    Qt.Key_VolumeUp: KEYCODE_VOLUME_UP,
+    Qt.Key_VolumeDown: KEYCODE_VOLUME_DOWN,
+}
+
+KEY_STATE_FIELDS = {
+    KEYCODE_POWER: ("screen", "foreground"),
+    KEYCODE_VOLUME_UP: ("volume",),
+    KEYCODE_VOLUME_DOWN: ("volume",),
+    KEYCODE_HOME: ("foreground",),
+    KEYCODE_BACK: ("foreground",),
+    KEYCODE_ENTER: ("foreground",),
+    KEYCODE_APP_SWITCH: ("foreground",),
+}
+
+KEY_BATCH_WINDOW_MS = 40
+KEY_BATCH_MAX = 16
+KEY_REPEAT_DELAY_MS = 350
+KEY_REPEAT_INTERVAL_MS = 120
+
+ADB_SERVER_HOST = "127.0.0.1"
+ADB_SERVER_PORT = int(os.environ.get("ANDROID_ADB_SERVER_PORT", 5037))
+ADB_BACKEND = os.environ.get("ANDROIDTVCONTROLLER_ADB_BACKEND", "process")
+KEY_BACKEND = os.environ.get("ANDROIDTVCONTROLLER_KEY_BACKEND", "input")
+NOTIFICATION_BACKEND = os.environ.get("ANDROIDTVCONTROLLER_NOTIFY", "auto")
+
+DEFAULT_TRANSLATIONS = {
+    "Español": {
+        "status_disconnected": "● Desconectado",
+        "status_connected": "● Conectado",
+        "text_input_placeholder": "Texto a enviar",
+        "send": "Enviar",
+        "connect_to_ip": "Conectar a IP",
+        "connect": "Conectar",
+        "disconnect_device": "Desconectar dispositivo",
+        "previous_connections": "Conexiones previas:",
+        "no_previous_connections": "Sin conexiones previas.",
+        "language": "Idioma:",
+        "close_settings": "Cerrar ajustes",
+        "connection_success": "Conexión exitosa",
+        "connection_error": "Error de conexión",
+        "disconnected": "Desconectado",
+        "send_to": "Enviar a:",
+        "current_device": "Dispositivo actual",
+        "all_devices": "Todos los dispositivos",
+        "reconnect_all": "Reconectar todos",
+        "discover": "Buscar",
+        "export": "Exportar",
+        "macros": "Macros",
+        "macro_name": "Nombre de la macro:",
+        "original_timing": "Usar tiempos originales",
+        "search_apps": "Buscar aplicaciones",
+        "refresh": "Actualizar",
+        "keyboard_passthrough": "Teclado al televisor (Ctrl+K)",
+        "screen_on": "Pantalla encendida",
+        "screen_off": "Pantalla apagada",
+        "volume": "Vol",
+        "muted": "Silenciado",
+        "transfer_done": "Transferencia completada",
+        "transfer_failed": "Error de transferencia",
+        "config_error": "No se pudo leer la configuración",
+        "session_restarts": "Reinicios de sesión"
+    },
+    "English": {
+        "status_disconnected": "● Disconnected",
+        "status_connected": "● Connected",
+        "text_input_placeholder": "Text to send",
+        "send": "Send",
+        "connect_to_ip": "Connect to IP",
+        "connect": "Connect",
+        "disconnect_device": "Disconnect device",
+        "previous_connections": "Previous connections:",
+        "no_previous_connections": "No previous connections.",
+        "language": "Language:",
+        "close_settings": "Close settings",
+        "connection_success": "Connection successful",
+        "connection_error": "Connection error",
+        "disconnected": "Disconnected",
+        "send_to": "Send to:",
+        "current_device": "Current device",
+        "all_devices": "All devices",
+        "reconnect_all": "Reconnect all",
+        "discover": "Discover",
+        "export": "Export",
+        "macros": "Macros",
+        "macro_name": "Macro name:",
+        "original_timing": "Use original timing",
+        "search_apps": "Search apps",
+        "refresh": "Refresh",
+        "keyboard_passthrough": "Keyboard to TV (Ctrl+K)",
+        "screen_on": "Screen on",
+        "screen_off": "Screen off",
+        "volume": "Vol",
+        "muted": "Muted",
+        "transfer_done": "Transfer finished",
+        "transfer_failed": "Transfer failed",
+        "config_error": "Could not read the settings",
+        "session_restarts": "Session restarts"
+    }
+}
+ADB_TCP_PORT = 5555
+PROBE_TIMEOUT = 0.6
+TEXT_CHUNK_MAX = 1000
+LATENCY_HISTORY = 500
+PREVIEW_WIDTH = 280
+PREVIEW_HEIGHT = 158
+PREVIEW_MIN_INTERVAL = 0.2
+PREVIEW_MAX_INTERVAL = 2.0
+DAEMON_OK_MARKER = "__ATV_OK__"
+DAEMON_LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "[::1]")
+CONFIG_WRITE_DELAY = 0.5
+NOTIFICATION_DURATION = 5
+NOTIFICATION_QUEUE_SIZE = 8
+NOTIFICATION_MIN_INTERVAL = 5.0
+NOTIFICATION_DEDUP_WINDOW = 30.0
+ADB_KEYBOARD_IME = "com.android.adbkeyboard/.AdbIME"
+DISCOVERY_TIMEOUT = 0.5
+DISCOVERY_CONCURRENCY = 256
+MONKEY_DEVICE_PORT = 1080
+MONKEY_TIMEOUT = 2.0
+MONKEY_START_TIMEOUT = 5.0
+MONKEY_RETRY_INTERVAL = 30.0
+DEVICE_STATE_TTL = 5.0
+DEVICE_STATE_DELAY_MS = 400
+DEVICE_STATE_QUERIES = {
+    "screen": "dumpsys power | grep -E 'mWakefulness=|Display Power: state='",
+    "volume": "dumpsys audio | grep -A 12 -E '^- STREAM_MUSIC:'",
+    "foreground": "dumpsys activity activities | grep -E 'mResumedActivity|topResumedActivity'",
+}
+DEVICE_STATE_KEYS = {"screen": ("screen",), "volume": ("volume", "volume_max", "muted"), "foreground": ("foreground",)}
+SYNC_CHUNK_SIZE = 64 * 1024
+TRANSFER_CONCURRENCY = int(os.environ.get("ANDROIDTVCONTROLLER_TRANSFER_CONCURRENCY", 4))
+TRANSFER_REMOTE_DIR = "/sdcard/Download"
+TRANSFER_APK_DIR = "/data/local/tmp"
+APP_CACHE_TTL = 24 * 60 * 60
+APP_INCREMENTAL_MAX = 20
+APP_SEARCH_LIMIT = 50
+LAUNCHER_CATEGORIES = ("android.intent.category.LEANBACK_LAUNCHER", "android.intent.category.LAUNCHER")
+MDNS_SERVICE_TYPES = ["_adb._tcp.local.", "_adb-tls-connect._tcp.local."]
+
+CREATE_NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+
+
+def get_adb_path():
+    return os.environ.get("ANDROIDTVCONTROLLER_ADB") or os.path.join(os.path.dirname(__file__), "platform-tools", "adb.exe" if os.name == "nt" else "adb")
+
+
+def write_json_atomic(path, data, ensure_ascii=True):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(data if isinstance(data, str) else json.dumps(data, indent=4, ensure_ascii=ensure_ascii))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize_latencies(samples):
+    if not samples:
+        return {"count": 0, "mean_ms": 0.0, "min_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+    values = [sample * 1000 for sample in samples]
+    ordered = sorted(values)
+    return {
+        "count": len(values),
+        "mean_ms": sum(values) / len(values),
+        "min_ms": ordered[0],
+        "max_ms": ordered[-1],
+        "last_ms": values[-1],
+        "p50_ms": percentile(ordered, 0.50),
+        "p95_ms": percentile(ordered, 0.95),
+        "p99_ms": percentile(ordered, 0.99),
+    }
+
+
+class LatencyRecorder:
+    def __init__(self, size=LATENCY_HISTORY):
+        self.size = size
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self.lock:
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = collections.deque(maxlen=self.size)
+            samples.append(seconds)
+
+    @contextlib.contextmanager
+    def measure(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def summary(self):
+        with self.lock:
+            snapshot = {name: list(samples) for name, samples in self.samples.items()}
+        return {name: summarize_latencies(samples) for name, samples in sorted(snapshot.items())}
+
+    def format_summary(self, extra=None):
+        lines = [f"{'metric':<24}{'n':>5}{'p50':>8}{'p95':>8}{'p99':>8}"]
+        for name, stats in {**self.summary(), **(extra or {})}.items():
+            lines.append(f"{name:<24}{stats['count']:>5}{stats['p50_ms']:>8.1f}{stats['p95_ms']:>8.1f}{stats['p99_ms']:>8.1f}")
+        return "\n".join(lines)
+
+    def export(self, path):
+        with self.lock:
+            samples = {name: [sample * 1000 for sample in values] for name, values in self.samples.items()}
+        write_json_atomic(path, {"summary": self.summary(), "samples_ms": samples})
+
+
+def run_adb_process(args, timeout=None, job=None, recorder=None):
+    started = time.perf_counter()
+    try:
+        process = subprocess.Popen([get_adb_path()] + args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, creationflags=CREATE_NO_WINDOW)
+        if recorder is not None:
+            recorder.record("adb.spawn", time.perf_counter() - started)
+        if job is not None:
+            job.process = process
+            if job.cancelled:
+                process.kill()
+        try:
+            stdout, _ = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+            process.stdout.close()
+            process.stderr.close()
+            return ""
+        return stdout
+    except Exception as e:
+        return str(e)
+    finally:
+        if recorder is not None:
+            recorder.record("adb.roundtrip", time.perf_counter() - started)
+
+
+def device_serial(ip):
+    return ip if ":" in ip else f"{ip}:5555"
+
+
+def probe_host(ip, timeout=PROBE_TIMEOUT):
+    host, _, port = ip.partition(":")
+    started = time.perf_counter()
+    try:
+        with socket.create_connection((host, int(port or ADB_TCP_PORT)), timeout):
+            return time.perf_counter() - started
+    except (OSError, ValueError):
+        return None
+
+
+def quote_shell(text):
+    return "'" + text.replace("'", "'\\''") + "'"
+
+
+def escape_input_text(text):
+    return quote_shell(text.replace(" ", "%s"))
+
+
+def file_md5(path):
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def split_chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def split_utf8(text, max_bytes):
+    chunks = []
+    chunk = []
+    size = 0
+    for char in text:
+        length = len(char.encode("utf-8"))
+        if chunk and size + length > max_bytes:
+            chunks.append("".join(chunk))
+            chunk = []
+            size = 0
+        chunk.append(char)
+        size += length
+    if chunk:
+        chunks.append("".join(chunk))
+    return chunks
+
+
+def local_ipv4():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        try:
+            sock.connect(("10.255.255.255", 1))
+            return sock.getsockname()[0]
+        except OSError:
+            return None
+
+
+def subnet_hosts(ip, prefix=24):
+    import ipaddress
+    network = ipaddress.ip_network(f"{ip}/{prefix}", strict=False)
+    return [str(host) for host in network.hosts() if str(host) != ip]
+
+
+def normalize_keycode(key):
+    key = key.strip().upper()
+    if key.isdigit() or key.startswith("KEYCODE_"):
+        return key
+    return "KEYCODE_" + key
+
+
+def parse_device_list(output):
+    devices = {}
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) >= 2 and not line.startswith(("List of devices", "*")):
+            devices[parts[0]] = parts[1]
+    return devices
+
+
+def parse_packages(output):
+    return sorted({line.strip()[len("package:"):] for line in output.splitlines() if line.strip().startswith("package:")})
+
+
+def parse_components(output):
+    components = {}
+    for line in output.splitlines():
+        line = line.strip()
+        if "/" in line and " " not in line and "=" not in line:
+            components.setdefault(line.split("/", 1)[0], line)
+    return components
+
+
+def parse_device_state(lines):
+    state = {}
+    section = None
+    for line in lines:
+        line = line.strip()
+        if line.startswith("@state:"):
+            section = line[len("@state:"):]
+        elif section == "screen":
+            if line.startswith("mWakefulness="):
+                state["screen"] = line.split("=", 1)[1] == "Awake"
+            elif line.startswith("Display Power: state=") and "screen" not in state:
+                state["screen"] = line.endswith("ON")
+        elif section == "volume":
+            if line.startswith("- STREAM_") and "volume_max" in state:
+                section = None
+            elif line.startswith("Muted:"):
+                state["muted"] = line.endswith("true")
+            elif line.startswith("Max:") and line[4:].strip().isdigit():
+                state["volume_max"] = int(line[4:])
+            elif line.startswith("streamVolume:") and line[13:].strip().isdigit():
+                state["volume"] = int(line[13:])
+            elif line.startswith("Current:") and "volume" not in state:
+                volumes = re.findall(r"\(([^)]*)\): (\d+)", line)
+                preferred = [volume for name, volume in volumes if "hdmi" in name] or [volume for name, volume in volumes]
+                if preferred:
+                    state["volume"] = int(preferred[0])
+        elif section == "foreground" and "foreground" not in state:
+            match = re.search(r"ActivityRecord\{\S+ \S+ ([^\s/]+)/", line)
+            if match:
+                state["foreground"] = match.group(1)
+    return state
+
+
+def fuzzy_score(query, text):
+    first = position = text.find(query[0])
+    if position < 0:
+        return None
+    for char in query[1:]:
+        position = text.find(char, position + 1)
+        if position < 0:
+            return None
+    return position - first
+
+
+class AdbShellSession:
+    def __init__(self, serial=None, history_size=200):
+        self.serial = serial
+        self.process = None
+        self.lines = None
+        self.lock = threading.Lock()
+        self.latencies = collections.deque(maxlen=history_size)
+        self.restarts = 0
+        self.reset_requested = False
+
+    def start(self):
+        args = [get_adb_path()]
+        if self.serial:
+            args += ["-s", self.serial]
+        args.append("shell")
+        self.process = subprocess.Popen(
+            args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, encoding="utf-8", errors="replace", bufsize=1, creationflags=CREATE_NO_WINDOW)
+        self.lines = queue.Queue()
+        reader = threading.Thread(target=self.read_output, args=(self.process.stdout, self.lines), daemon=True)
+        reader.start()
+
+    def read_output(self, stream, lines):
+        try:
+            for line in stream:
+                lines.put(line)
+        except (OSError, ValueError):
+            pass
+        lines.put(None)
+
+    def send(self, data):
+        self.process.stdin.write(data)
+        self.process.stdin.flush()
+
+    def is_open(self):
+        return self.process is not None
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def reset(self):
+        self.reset_requested = True
+
+    def close(self):
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process = None
+        self.lines = None
+
+    def run(self, command, timeout=10):
+        with self.lock:
+            if self.reset_requested:
+                self.reset_requested = False
+                self.close()
+            for attempt in range(2):
+                if not self.is_alive():
+                    if self.is_open():
+                        self.close()
+                        self.restarts += 1
+                    try:
+                        self.start()
+                    except OSError as e:
+                        return str(e)
+                marker = f"__ATV_{uuid.uuid4().hex}__"
+                try:
+                    self.send(f"{command}\necho {marker}\n")
+                except OSError:
+                    self.close()
+                    self.restarts += 1
+                    continue
+                started = time.perf_counter()
+                try:
+                    output = self.read_until(marker, started + timeout)
+                except (ConnectionError, TimeoutError) as e:
+                    self.close()
+                    return str(e)
+                self.latencies.append(time.perf_counter() - started)
+                return output
+            return ""
+
+    def read_until(self, marker, deadline):
+        output = []
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                raise TimeoutError("adb shell command timed out")
+            try:
+                line = self.lines.get(timeout=remaining)
+            except queue.Empty:
+                raise TimeoutError("adb shell command timed out")
+            if line is None:
+                raise ConnectionError("adb shell session closed")
+            if marker in line:
+                output.append(line[:line.index(marker)])
+                return "".join(output)
+            output.append(line)
+
+    def latency_stats(self):
+        return summarize_latencies(list(self.latencies))
+
+
+class AdbServerClient:
+    def __init__(self, host=ADB_SERVER_HOST, port=ADB_SERVER_PORT, timeout=10):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def connect(self, timeout=None):
+        sock = socket.create_connection((self.host, self.port), timeout or self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def send_request(self, sock, request):
+        data = request.encode("utf-8")
+        sock.sendall(b"%04x" % len(data) + data)
+        status = self.recv_exact(sock, 4)
+        if status == b"OKAY":
+            return
+        if status == b"FAIL":
+            raise ConnectionError(self.read_message(sock))
+        raise ConnectionError(f"unexpected adb server reply {status!r}")
+
+    def recv_exact(self, sock, size):
+        data = b""
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("adb server closed the connection")
+            data += chunk
+        return data
+
+    def read_message(self, sock):
+        length = int(self.recv_exact(sock, 4), 16)
+        return self.recv_exact(sock, length).decode("utf-8", "replace") if length else ""
+
+    def read_all(self, sock):
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+    def query(self, request, timeout=None):
+        with self.connect(timeout) as sock:
+            self.send_request(sock, request)
+            return self.read_message(sock)
+
+    def open_transport(self, serial=None, timeout=None):
+        sock = self.connect(timeout)
+        try:
+            self.send_request(sock, f"host:transport:{serial}" if serial else "host:transport-any")
+        except (OSError, ValueError):
+            sock.close()
+            raise
+        return sock
+
+    def devices(self):
+        return parse_device_list(self.query("host:devices"))
+
+    def shell(self, serial, command, timeout=None):
+        with self.open_transport(serial, timeout) as sock:
+            self.send_request(sock, "shell:" + command)
+            return self.read_all(sock).decode("utf-8", "replace")
+
+    def exec_out(self, serial, command, timeout=None):
+        with self.open_transport(serial, timeout) as sock:
+            self.send_request(sock, "exec:" + command)
+            return self.read_all(sock)
+
+    def push(self, serial, local_path, remote_path, mode=0o644, progress=None, timeout=None):
+        total = os.path.getsize(local_path)
+        sent = 0
+        with self.open_transport(serial, timeout) as sock, open(local_path, "rb") as f:
+            self.send_request(sock, "sync:")
+            target = f"{remote_path},{0o100000 | mode}".encode("utf-8")
+            sock.sendall(b"SEND" + struct.pack("<I", len(target)) + target)
+            for chunk in iter(lambda: f.read(SYNC_CHUNK_SIZE), b""):
+                sock.sendall(b"DATA" + struct.pack("<I", len(chunk)) + chunk)
+                sent += len(chunk)
+                if progress is not None:
+                    progress(sent, total)
+            sock.sendall(b"DONE" + struct.pack("<I", int(os.path.getmtime(local_path))))
+            status = self.recv_exact(sock, 4)
+            length = struct.unpack("<I", self.recv_exact(sock, 4))[0]
+            if status != b"OKAY":
+                raise ConnectionError(self.recv_exact(sock, length).decode("utf-8", "replace") if length else "adb push failed")
+            sock.sendall(b"QUIT" + struct.pack("<I", 0))
+        return sent
+
+    def session(self, serial=None):
+        with self.lock:
+            session = self.sessions.get(serial)
+            if session is None:
+                session = AdbServerShellSession(self, serial)
+                self.sessions[serial] = session
+            return session
+
+    def close(self):
+        with self.lock:
+            sessions = list(self.sessions.values())
+            self.sessions.clear()
+        for session in sessions:
+            session.close()
+
+    def run(self, args, timeout=None):
+        serial = None
+        if args[:1] == ["-s"] and len(args) > 2:
+            serial, args = args[1], args[2:]
+        command = args[0] if args else None
+        try:
+            if command == "shell" and len(args) > 1:
+                return self.session(serial).run(" ".join(args[1:]), timeout or self.timeout)
+            if command == "devices":
+                return "List of devices attached\n" + self.query("host:devices", timeout)
+            if command == "get-state":
+                return self.query(f"host-serial:{serial}:get-state" if serial else "host:get-state", timeout)
+            if command == "connect" and len(args) == 2:
+                return self.query(f"host:connect:{device_serial(args[1])}", timeout)
+            if command == "disconnect" and len(args) == 2:
+                return self.query(f"host:disconnect:{device_serial(args[1])}", timeout)
+        except ConnectionRefusedError:
+            return None
+        except (OSError, ValueError) as e:
+            return str(e)
+        return None
+
+
+class AdbServerShellSession(AdbShellSession):
+    def __init__(self, client, serial=None, history_size=200):
+        super().__init__(serial, history_size)
+        self.client = client
+        self.sock = None
+        self.eof = False
+
+    def start(self):
+        sock = self.client.open_transport(self.serial)
+        try:
+            self.client.send_request(sock, "shell,raw:")
+        except (OSError, ValueError):
+            sock.close()
+            raise
+        sock.settimeout(None)
+        self.sock = sock
+        self.eof = False
+        self.lines = queue.Queue()
+        stream = sock.makefile("r", encoding="utf-8", errors="replace", newline="")
+        reader = threading.Thread(target=self.read_socket, args=(stream, self.lines), daemon=True)
+        reader.start()
+
+    def read_socket(self, stream, lines):
+        self.read_output(stream, lines)
+        self.eof = True
+
+    def send(self, data):
+        self.sock.sendall(data.encode("utf-8"))
+
+    def is_open(self):
+        return self.sock is not None
+
+    def is_alive(self):
+        return self.sock is not None and not self.eof
+
+    def close(self):
+        if self.sock is None:
+            return
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+        self.sock = None
+        self.lines = None
+
+
+class DeviceRegistry:
+    def __init__(self, client=None, max_workers=32):
+        self.client = client
+        self.sessions = {}
+        self.groups = {}
+        self.lock = threading.Lock()
+        self.max_workers = max_workers
+        self.pool = None
+
+    def load(self, ips):
+        for ip in ips.get("ip_addresses", []):
+            self.add(ip)
+        self.groups = {name: list(members) for name, members in ips.get("groups", {}).items()}
+
+    def add(self, ip):
+        serial = device_serial(ip)
+        with self.lock:
+            if serial not in self.sessions:
+                self.sessions[serial] = self.client.session(serial) if self.client else AdbShellSession(serial)
+            return self.sessions[serial]
+
+    def remove(self, ip):
+        with self.lock:
+            session = self.sessions.pop(device_serial(ip), None)
+        if session is not None:
+            session.close()
+
+    def session(self, ip):
+        with self.lock:
+            session = self.sessions.get(device_serial(ip))
+        return session or self.add(ip)
+
+    def resolve(self, target):
+        if target in (None, "all"):
+            with self.lock:
+                return list(self.sessions)
+        if target in self.groups:
+            return [device_serial(ip) for ip in self.groups[target]]
+        return [device_serial(target)]
+
+    def run(self, target, command, timeout=10):
+        serials = self.resolve(target)
+        if len(serials) == 1:
+            return {serials[0]: self.session(serials[0]).run(command, timeout)}
+        pool = self.executor()
+        futures = {serial: pool.submit(self.session(serial).run, command, timeout) for serial in serials}
+        return {serial: future.result() for serial, future in futures.items()}
+
+    def executor(self):
+        import concurrent.futures
+        with self.lock:
+            if self.pool is None:
+                self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="adb-fanout")
+            return self.pool
+
+    def latency_stats(self):
+        with self.lock:
+            sessions = dict(self.sessions)
+        return {serial: dict(session.latency_stats(), restarts=session.restarts) for serial, session in sessions.items()}
+
+    def reset(self, ip=None):
+        with self.lock:
+            sessions = list(self.sessions.values()) if ip is None else [self.sessions.get(device_serial(ip))]
+        for session in sessions:
+            if session is not None:
+                session.reset()
+
+    def close(self):
+        with self.lock:
+            sessions = list(self.sessions.values())
+        for session in sessions:
+            session.close()
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
+
+
+class TextInjector:
+    def __init__(self, run_shell, chunk_max=TEXT_CHUNK_MAX, prefer_broadcast=True):
+        self.run_shell = run_shell
+        self.chunk_max = chunk_max
+        self.prefer_broadcast = prefer_broadcast
+        self.capabilities = {}
+        self.last_stats = None
+
+    def probe(self, target=None):
+        if target in self.capabilities:
+            return self.capabilities[target]
+        output = self.run_shell("getconf ARG_MAX 2>/dev/null; echo; settings get secure default_input_method 2>/dev/null", target=target)
+        lines = [line.strip() for line in output.splitlines() if line.strip()]
+        arg_max = int(lines[0]) if lines and lines[0].isdigit() else 4096
+        capabilities = {
+            "chunk_size": max(64, min(self.chunk_max, arg_max // 4)),
+            "broadcast": any(ADB_KEYBOARD_IME in line for line in lines),
+        }
+        self.capabilities[target] = capabilities
+        return capabilities
+
+    def forget(self, target=None):
+        self.capabilities.pop(target, None)
+
+    def build_commands(self, text, capabilities):
+        if capabilities["broadcast"] and (self.prefer_broadcast or not text.isascii()):
+            chunks = split_utf8(text, capabilities["chunk_size"] // 4 * 3)
+            payloads = [base64.b64encode(chunk.encode("utf-8")).decode("ascii") for chunk in chunks]
+            return [f"am broadcast -a ADB_INPUT_B64 --es msg {payload} >/dev/null" for payload in payloads], "broadcast", 0
+        ascii_text = text.encode("ascii", "ignore").decode("ascii")
+        commands = [f"input text {escape_input_text(chunk)}" for chunk in split_chunks(ascii_text, capabilities["chunk_size"])]
+        return commands, "input", len(text) - len(ascii_text)
+
+    def send(self, text, target=None):
+        started = time.perf_counter()
+        capabilities = self.probe(target)
+        commands, method, dropped = self.build_commands(text, capabilities)
+        output = self.run_shell("\n".join(commands), target=target) if commands else ""
+        elapsed = time.perf_counter() - started
+        self.last_stats = {
+            "chars": len(text),
+            "chunks": len(commands),
+            "dropped": dropped,
+            "method": method,
+            "seconds": elapsed,
+            "chars_per_second": len(text) / elapsed if elapsed > 0 else 0.0,
+            "output": output,
+        }
+        return self.last_stats
+
+
+class AdbJob:
+    def __init__(self, args=None, command=None, callback=None, timeout=None, func=None):
+        self.args = args
+        self.command = command
+        self.func = func
+        self.callback = callback
+        self.timeout = timeout
+        self.process = None
+        self.output = ""
+        self.error = None
+        self.cancelled = False
+        self.done = False
+        self.submitted = time.perf_counter()
+
+    def cancel(self):
+        self.cancelled = True
+        process = self.process
+        if process is not None and process.poll() is None:
+            process.kill()
+
+
+class AdbCommandExecutor(QObject):
+    job_finished = pyqtSignal(object)
+
+    def __init__(self, runner, shell_runner, max_pending=32, default_timeout=15, recorder=None, name="adb", parent=None):
+        super().__init__(parent)
+        self.recorder = recorder
+        self.name = name
+        self.runner = runner
+        self.shell_runner = shell_runner
+        self.default_timeout = default_timeout
+        self.jobs = queue.Queue(maxsize=max_pending)
+        self.current_job = None
+        self.job_finished.connect(self.deliver)
+        self.worker = threading.Thread(target=self.work, daemon=True)
+        self.worker.start()
+
+    def submit(self, args, callback=None, timeout=None):
+        return self.enqueue(AdbJob(args=args, callback=callback, timeout=timeout or self.default_timeout))
+
+    def submit_shell(self, command, callback=None, timeout=None):
+        return self.enqueue(AdbJob(command=command, callback=callback, timeout=timeout or self.default_timeout))
+
+    def submit_call(self, func, callback=None):
+        return self.enqueue(AdbJob(func=func, callback=callback))
+
+    def enqueue(self, job):
+        try:
+            self.jobs.put_nowait(job)
+        except queue.Full:
+            return None
+        return job
+
+    def pending(self):
+        return self.jobs.qsize()
+
+    def cancel_all(self):
+        while True:
+            try:
+                job = self.jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                job.cancel()
+        job = self.current_job
+        if job is not None:
+            job.cancel()
+
+    def shutdown(self):
+        self.cancel_all()
+        self.jobs.put(None)
+
+    def work(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            if job.cancelled:
+                continue
+            self.current_job = job
+            started = time.perf_counter()
+            if self.recorder is not None:
+                self.recorder.record(f"{self.name}.queue_wait", started - job.submitted)
+            try:
+                if job.func is not None:
+                    job.output = job.func()
+                elif job.command is not None:
+                    job.output = self.shell_runner(job.command, job.timeout)
+                else:
+                    job.output = self.runner(job.args, job.timeout, job)
+            except Exception as e:
+                job.error = e
+                job.output = str(e)
+                print(f"{self.name} job failed: {e!r}", file=sys.stderr)
+            if self.recorder is not None:
+                self.recorder.record(f"{self.name}.job", time.perf_counter() - started)
+            self.current_job = None
+            job.done = True
+            if not job.cancelled:
+                self.job_finished.emit(job)
+
+    def deliver(self, job):
+        if job.func is not None and job.error is not None:
+            return
+        if job.callback is not None and not job.cancelled:
+            job.callback(job.output)
+
+
+class ConnectionMonitor(QObject):
+    state_changed = pyqtSignal(str, str)
+    devices_changed = pyqtSignal(object)
+    devices_reported = pyqtSignal(object)
+    tracker_stopped = pyqtSignal(object)
+
+    def __init__(self, executor, client=None, min_interval_ms=3000, max_interval_ms=60000, recorder=None, parent=None):
+        super().__init__(parent)
+        self.executor = executor
+        self.client = client
+        self.recorder = recorder
+        self.poll_started = 0.0
+        self.min_interval_ms = min_interval_ms
+        self.max_interval_ms = max_interval_ms
+        self.interval_ms = min_interval_ms
+        self.devices = {}
+        self.tracker = None
+        self.poll_job = None
+        self.stopped = True
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setSingleShot(True)
+        self.poll_timer.timeout.connect(self.poll)
+        self.devices_reported.connect(self.apply)
+        self.tracker_stopped.connect(self.on_tracker_stopped)
+
+    def start(self):
+        self.stopped = False
+        if not self.start_tracking():
+            self.poll()
+
+    def stop(self):
+        self.stopped = True
+        self.poll_timer.stop()
+        tracker = self.tracker
+        self.tracker = None
+        if isinstance(tracker, socket.socket):
+            tracker.close()
+        elif tracker is not None and tracker.poll() is None:
+            tracker.kill()
+
+    def refresh(self):
+        if self.tracker is None and not self.stopped:
+            self.interval_ms = self.min_interval_ms
+            self.poll()
+
+    def start_tracking(self):
+        try:
+            if self.client is not None:
+                tracker = self.client.connect()
+                self.client.send_request(tracker, "host:track-devices")
+                tracker.settimeout(None)
+                stream = tracker.makefile("rb")
+            else:
+                tracker = subprocess.Popen([get_adb_path(), "track-devices"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, creationflags=CREATE_NO_WINDOW)
+                stream = tracker.stdout
+        except (OSError, ValueError):
+            return False
+        self.tracker = tracker
+        self.poll_timer.stop()
+        reader = threading.Thread(target=self.read_tracker, args=(tracker, stream), daemon=True)
+        reader.start()
+        return True
+
+    def read_tracker(self, tracker, stream):
+        while True:
+            header = stream.read(4)
+            if len(header) < 4:
+                break
+            try:
+                length = int(header, 16)
+            except ValueError:
+                break
+            payload = stream.read(length) if length else b""
+            self.devices_reported.emit(parse_device_list(payload.decode("utf-8", "replace")))
+        stream.close()
+        self.tracker_stopped.emit(tracker)
+
+    def on_tracker_stopped(self, tracker):
+        if tracker is not self.tracker:
+            return
+        self.tracker = None
+        if not self.stopped:
+            self.schedule_poll()
+
+    def poll(self):
+        if self.stopped or (self.poll_job is not None and not self.poll_job.done and not self.poll_job.cancelled):
+            return
+        self.poll_started = time.perf_counter()
+        self.poll_job = self.executor.submit(["devices"], self.on_poll_result, timeout=5)
+        if self.poll_job is None:
+            self.schedule_poll()
+
+    def on_poll_result(self, output):
+        if self.recorder is not None:
+            self.recorder.record("connection.poll", time.perf_counter() - self.poll_started)
+        changed = self.apply(parse_device_list(output))
+        if changed:
+            self.interval_ms = self.min_interval_ms
+        else:
+            self.interval_ms = min(self.interval_ms * 2, self.max_interval_ms)
+        if self.stopped or self.start_tracking():
+            return
+        self.schedule_poll()
+
+    def schedule_poll(self):
+        if not self.stopped:
+            self.poll_timer.start(self.interval_ms)
+
+    def apply(self, devices):
+        previous = self.devices
+        self.devices = devices
+        changed = False
+        for serial in set(previous) | set(devices):
+            state = devices.get(serial, "disconnected")
+            if previous.get(serial, "disconnected") != state:
+                changed = True
+                self.state_changed.emit(serial, state)
+        if changed:
+            self.devices_changed.emit(dict(devices))
+        return changed
+
+
+class ReachabilityScanner(QObject):
+    host_probed = pyqtSignal(str, object)
+    scan_finished = pyqtSignal()
+
+    def __init__(self, timeout=PROBE_TIMEOUT, max_workers=32, parent=None):
+        super().__init__(parent)
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.scanning = False
+
+    def scan(self, ips):
+        if self.scanning or not ips:
+            return False
+        self.scanning = True
+        worker = threading.Thread(target=self.probe_all, args=(list(ips),), daemon=True)
+        worker.start()
+        return True
+
+    def probe_all(self, ips):
+        import concurrent.futures
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(self.max_workers, len(ips))) as pool:
+                futures = {pool.submit(probe_host, ip, self.timeout): ip for ip in ips}
+                for future in concurrent.futures.as_completed(futures):
+                    self.host_probed.emit(futures[future], future.result())
+        finally:
+            self.scanning = False
+            self.scan_finished.emit()
+
+
+class DiscoveryEngine(QObject):
+    device_found = pyqtSignal(str, str)
+    discovery_finished = pyqtSignal()
+
+    def __init__(self, port=ADB_TCP_PORT, timeout=DISCOVERY_TIMEOUT, concurrency=DISCOVERY_CONCURRENCY, parent=None):
+        super().__init__(parent)
+        self.port = port
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.scanning = False
+        self.mdns = None
+        self.browsers = []
+
+    def discover(self, hosts=None, sweep=True):
+        self.browse_mdns()
+        if not sweep or self.scanning:
+            return False
+        if hosts is None:
+            ip = local_ipv4()
+            hosts = subnet_hosts(ip) if ip else []
+        self.scanning = True
+        worker = threading.Thread(target=self.run_sweep, args=(list(hosts),), daemon=True)
+        worker.start()
+        return True
+
+    def run_sweep(self, hosts):
+        import asyncio
+        try:
+            asyncio.run(self.sweep(hosts))
+        finally:
+            self.scanning = False
+            self.discovery_finished.emit()
+
+    async def sweep(self, hosts):
+        import asyncio
+        semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(self.probe(host, semaphore) for host in hosts))
+
+    async def probe(self, host, semaphore):
+        import asyncio
+        async with semaphore:
+            try:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(host, self.port), self.timeout)
+            except (OSError, asyncio.TimeoutError):
+                return
+            writer.close()
+            address = host if self.port == ADB_TCP_PORT else f"{host}:{self.port}"
+            self.device_found.emit(address, "scan")
+
+    def browse_mdns(self):
+        if self.mdns is not None:
+            return
+        try:
+            zeroconf = importlib.import_module("zeroconf")
+        except ImportError:
+            return
+        self.state_added = zeroconf.ServiceStateChange.Added
+        try:
+            self.mdns = zeroconf.Zeroconf()
+            self.browsers = [zeroconf.ServiceBrowser(self.mdns, service_type, handlers=[self.on_service_state_change]) for service_type in MDNS_SERVICE_TYPES]
+        except OSError:
+            self.mdns = None
+
+    def on_service_state_change(self, zeroconf, service_type, name, state_change):
+        if state_change is not self.state_added:
+            return
+        info = zeroconf.get_service_info(service_type, name, 2000)
+        if info is None:
+            return
+        for address in info.parsed_addresses():
+            self.device_found.emit(f"{address}:{info.port}" if info.port != ADB_TCP_PORT else address, "mdns")
+
+    def stop(self):
+        if self.mdns is not None:
+            self.mdns.close()
+            self.mdns = None
+            self.browsers = []
+
+
+class TransferManager(QObject):
+    progress = pyqtSignal(str, str, int, int)
+    finished = pyqtSignal(str, str, bool, str)
+
+    def __init__(self, client=None, max_workers=TRANSFER_CONCURRENCY, recorder=None, parent=None):
+        super().__init__(parent)
+        self.client = client or AdbServerClient()
+        self.recorder = recorder
+        self.max_workers = max(1, max_workers)
+        self.pool = None
+        self.lock = threading.Lock()
+
+    def shell(self, serial, command):
+        try:
+            return self.client.shell(serial, command)
+        except ConnectionRefusedError:
+            return run_adb_process(["-s", serial, "shell", command], 120)
+
+    def remote_md5(self, serial, remote_path):
+        output = self.shell(serial, f"md5sum {quote_shell(remote_path)} 2>/dev/null").split()
+        return output[0] if output and len(output[0]) == 32 else None
+
+    def upload(self, serial, local_path, remote_path, report):
+        try:
+            self.client.push(serial, local_path, remote_path, progress=report)
+            return True
+        except ConnectionRefusedError:
+            pass
+        process = subprocess.run([get_adb_path(), "-s", serial, "push", local_path, remote_path], capture_output=True,
+                                 text=True, encoding="utf-8", errors="replace", creationflags=CREATE_NO_WINDOW)
+        if process.returncode != 0:
+            raise ConnectionError((process.stderr or process.stdout).strip() or "adb push failed")
+        size = os.path.getsize(local_path)
+        report(size, size)
+        return False
+
+    def transfer(self, serial, local_path, remote_path, install=False):
+        name = os.path.basename(local_path)
+        last_percent = -1
+
+        def report(sent, total):
+            nonlocal last_percent
+            percent = sent * 100 // total if total else 100
+            if percent != last_percent:
+                last_percent = percent
+                self.progress.emit(serial, name, sent, total)
+
+        try:
+            digest = file_md5(local_path)
+            if self.remote_md5(serial, remote_path) == digest:
+                result = "skipped"
+            else:
+                started = time.perf_counter()
+                confirmed = self.upload(serial, local_path, remote_path, report)
+                if self.recorder is not None:
+                    self.recorder.record("transfer.push", time.perf_counter() - started)
+                remote_digest = self.remote_md5(serial, remote_path)
+                if remote_digest is not None and remote_digest != digest:
+                    raise ConnectionError("checksum mismatch")
+                if remote_digest is None and not confirmed:
+                    raise ConnectionError("adb push could not be confirmed on the device")
+                result = "verified" if remote_digest else "pushed"
+            if install:
+                output = self.shell(serial, f"pm install -r -t {quote_shell(remote_path)}")
+                if "Success" not in output:
+                    raise ConnectionError(output.strip() or "install failed")
+                result = "installed"
+        except (OSError, ValueError) as e:
+            self.finished.emit(serial, name, False, str(e))
+            return False
+        self.finished.emit(serial, name, True, result)
+        return True
+
+    def send(self, serials, local_path, remote_dir=TRANSFER_REMOTE_DIR):
+        name = os.path.basename(local_path)
+        install = name.lower().endswith(".apk")
+        remote_path = f"{TRANSFER_APK_DIR if install else remote_dir}/{name}"
+        import concurrent.futures
+        with self.lock:
+            if self.pool is None:
+                self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="adb-transfer")
+        return [self.pool.submit(self.transfer, serial, local_path, remote_path, install) for serial in serials]
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
+
+
+class ScreenPreview(QObject):
+    frame_ready = pyqtSignal(object)
+
+    def __init__(self, client=None, width=PREVIEW_WIDTH, height=PREVIEW_HEIGHT, recorder=None, parent=None):
+        super().__init__(parent)
+        self.client = client
+        self.width = width
+        self.height = height
+        self.recorder = recorder
+        self.serial = None
+        self.running = False
+        self.generation = 0
+        self.last_digest = None
+        self.interval = PREVIEW_MIN_INTERVAL
+        self.frame_consumed = threading.Event()
+        self.wake = threading.Event()
+
+    def start(self, serial):
+        self.serial = serial
+        self.last_digest = None
+        self.frame_consumed.set()
+        if self.running:
+            return
+        self.running = True
+        self.generation += 1
+        self.wake.clear()
+        worker = threading.Thread(target=self.capture_loop, args=(self.generation,), daemon=True)
+        worker.start()
+
+    def stop(self):
+        self.running = False
+        self.wake.set()
+
+    def capture(self):
+        if self.client is not None:
+            try:
+                return self.client.exec_out(self.serial, "screencap -p", timeout=10)
+            except ConnectionRefusedError:
+                pass
+        args = [get_adb_path()] + (["-s", self.serial] if self.serial else []) + ["exec-out", "screencap", "-p"]
+        try:
+            return subprocess.run(args, capture_output=True, timeout=10, creationflags=CREATE_NO_WINDOW).stdout
+        except (OSError, subprocess.TimeoutExpired):
+            return b""
+
+    def capture_loop(self, generation):
+        while self.running and generation == self.generation:
+            started = time.perf_counter()
+            data = self.capture()
+            transfer = time.perf_counter() - started
+            if self.recorder is not None:
+                self.recorder.record("preview.capture", transfer)
+            digest = hashlib.blake2b(data, digest_size=16).digest() if data else None
+            if digest is not None and digest != self.last_digest and self.frame_consumed.is_set():
+                image = QImage.fromData(data, "PNG")
+                if not image.isNull():
+                    self.last_digest = digest
+                    self.frame_consumed.clear()
+                    self.frame_ready.emit(image.scaled(self.width, self.height, Qt.KeepAspectRatio, Qt.SmoothTransformation).convertToFormat(QImage.Format_RGB32))
+                self.interval = max(PREVIEW_MIN_INTERVAL, min(PREVIEW_MAX_INTERVAL, transfer * 1.5))
+            else:
+                self.interval = min(PREVIEW_MAX_INTERVAL, max(self.interval, transfer) * 1.5)
+            self.wake.wait(self.interval)
+
+    def frame_shown(self):
+        self.frame_consumed.set()
+
+    def poke(self):
+        self.interval = PREVIEW_MIN_INTERVAL
+        self.wake.set()
+        self.wake.clear()
+
+
+class MonkeyInputBackend:
+    def __init__(self, run_adb=None, address=None, device_port=MONKEY_DEVICE_PORT, timeout=MONKEY_TIMEOUT, recorder=None):
+        self.run_adb = run_adb
+        self.address = address
+        self.device_port = device_port
+        self.timeout = timeout
+        self.recorder = recorder
+        self.serial = None
+        self.sock = None
+        self.reader = None
+        self.starting = None
+        self.forwards = {}
+        self.started = set()
+        self.retry_at = 0.0
+        self.lock = threading.Lock()
+
+    def forward(self, serial):
+        output = self.run_adb(["-s", serial, "forward", "tcp:0", f"tcp:{self.device_port}"], 10).strip()
+        if not output.isdigit():
+            raise OSError(output or "adb forward failed")
+        port = int(output)
+        with self.lock:
+            self.forwards[serial] = port
+        output = self.run_adb(["-s", serial, "shell", f"pidof com.android.commands.monkey >/dev/null && echo running || (setsid nohup monkey --port {self.device_port} >/dev/null 2>&1 </dev/null & echo started)"], 10)
+        if "started" in output:
+            with self.lock:
+                self.started.add(serial)
+        return ("127.0.0.1", port)
+
+    def release(self, serial):
+        with self.lock:
+            port = self.forwards.pop(serial, None)
+            started = serial in self.started
+            self.started.discard(serial)
+        if port is not None:
+            self.run_adb(["-s", serial, "forward", "--remove", f"tcp:{port}"], 5)
+        if started:
+            self.run_adb(["-s", serial, "shell", "kill $(pidof com.android.commands.monkey) 2>/dev/null"], 5)
+
+    def connect(self, serial):
+        address = self.address or self.forward(serial)
+        deadline = time.monotonic() + MONKEY_START_TIMEOUT
+        while True:
+            sock = reader = None
+            try:
+                sock = socket.create_connection(address, self.timeout)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                reader = sock.makefile("r", encoding="utf-8", newline="\n")
+                self.command(sock, reader, ["getvar build.version.sdk"])
+                return sock, reader
+            except (OSError, ValueError, UnicodeDecodeError):
+                self.disconnect(sock, reader)
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.2)
+
+    def start(self, serial, previous=None):
+        if previous is not None:
+            self.release(previous)
+        try:
+            sock, reader = self.connect(serial)
+        except (OSError, ValueError, UnicodeDecodeError):
+            sock = reader = None
+        with self.lock:
+            self.starting = None
+            current = self.serial in (None, serial)
+            if current and sock is None:
+                self.retry_at = time.monotonic() + MONKEY_RETRY_INTERVAL
+            elif current and self.sock is None:
+                self.serial = serial
+                self.sock, self.reader = sock, reader
+                return True
+        self.disconnect(sock, reader)
+        if not current:
+            self.release(serial)
+        return False
+
+    def command(self, sock, reader, lines):
+        sock.sendall("".join(line + "\n" for line in lines).encode("utf-8"))
+        for _ in lines:
+            reply = reader.readline()
+            if not reply.startswith("OK"):
+                raise OSError(reply.strip() or "monkey closed the connection")
+
+    def send(self, serial, keycodes):
+        with self.lock:
+            previous = None
+            if serial != self.serial:
+                previous = self.serial
+                self.disconnect(self.sock, self.reader)
+                self.sock = self.reader = None
+                self.serial = serial
+                self.retry_at = 0.0
+            if self.sock is None:
+                if self.starting is None and time.monotonic() >= self.retry_at:
+                    self.starting = serial
+                    threading.Thread(target=self.start, args=(serial, previous), daemon=True).start()
+                elif previous is not None and previous != self.starting:
+                    threading.Thread(target=self.release, args=(previous,), daemon=True).start()
+                return False
+            try:
+                started = time.perf_counter()
+                self.command(self.sock, self.reader, [f"press {keycode}" for keycode in keycodes])
+                if self.recorder is not None:
+                    self.recorder.record("monkey.key", time.perf_counter() - started)
+                return True
+            except (OSError, ValueError, UnicodeDecodeError):
+                self.disconnect(self.sock, self.reader)
+                self.sock = self.reader = None
+                self.retry_at = time.monotonic() + MONKEY_RETRY_INTERVAL
+                return False
+
+    def disconnect(self, sock, reader):
+        for closable in (reader, sock):
+            if closable is not None:
+                with contextlib.suppress(OSError):
+                    closable.close()
+
+    def close(self):
+        with self.lock:
+            self.disconnect(self.sock, self.reader)
+            self.sock = self.reader = None
+            serials = set(self.forwards) | self.started
+        if self.run_adb is not None:
+            for serial in serials:
+                self.release(serial)
+
+
+class KeyEventPipeline(QObject):
+    def __init__(self, executor, window_ms=KEY_BATCH_WINDOW_MS, max_batch=KEY_BATCH_MAX, max_pending=64, recorder=None, text_builder=None, key_injector=None, parent=None):
+        super().__init__(parent)
+        self.executor = executor
+        self.recorder = recorder
+        self.key_injector = key_injector
+        self.text_builder = text_builder or (lambda text: [f"input text {escape_input_text(text)}"])
+        self.max_batch = max_batch
+        self.pending = collections.deque(maxlen=max_pending)
+        self.in_flight = None
+        self.batch_pushed_at = []
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(window_ms)
+        self.timer.timeout.connect(self.flush)
+
+    def push(self, keycode, immediate=False):
+        self.pending.append((keycode, time.perf_counter()))
+        self.schedule(immediate)
+
+    def push_text(self, text, immediate=False):
+        if self.pending and isinstance(self.pending[-1][0], tuple):
+            token, pushed_at = self.pending.pop()
+            self.pending.append((("text", token[1] + text), pushed_at))
+        else:
+            self.pending.append((("text", text), time.perf_counter()))
+        self.schedule(immediate)
+
+    def schedule(self, immediate=False):
+        if immediate or len(self.pending) >= self.max_batch:
+            self.flush()
+        elif not self.timer.isActive():
+            self.timer.start()
+
+    def busy(self):
+        return self.in_flight is not None and not self.in_flight.cancelled and not self.in_flight.done
+
+    def flush(self):
+        self.timer.stop()
+        if not self.pending or self.busy():
+            return
+        batch = []
+        while self.pending and len(batch) < self.max_batch:
+            batch.append(self.pending.popleft())
+        tokens = [token for token, pushed_at in batch]
+        if self.key_injector is not None and not any(isinstance(token, tuple) for token in tokens):
+            self.in_flight = self.executor.submit_call(lambda: self.inject(tokens), self.on_batch_done)
+        else:
+            self.in_flight = self.executor.submit_shell(self.build_command(tokens), self.on_batch_done)
+        if self.in_flight is None:
+            self.pending.extendleft(reversed(batch))
+            self.timer.start()
+            return
+        self.batch_pushed_at = [pushed_at for token, pushed_at in batch]
+
+    def inject(self, keycodes):
+        try:
+            injected = self.key_injector(keycodes)
+        except Exception:
+            injected = False
+        if injected:
+            return ""
+        return self.executor.shell_runner(self.build_command(keycodes), self.executor.default_timeout)
+
+    def build_command(self, tokens):
+        commands = []
+        keycodes = []
+        for token in tokens:
+            if not isinstance(token, tuple):
+                keycodes.append(token)
+                continue
+            if keycodes:
+                commands.append("input keyevent " + " ".join(keycodes))
+                keycodes = []
+            commands += self.text_builder(token[1])
+        if keycodes:
+            commands.append("input keyevent " + " ".join(keycodes))
+        return "; ".join(commands)
+
+    def on_batch_done(self, output):
+        self.in_flight = None
+        if self.recorder is not None:
+            now = time.perf_counter()
+            for pushed_at in self.batch_pushed_at:
+                self.recorder.record("key.press_to_device", now - pushed_at)
+        if self.pending:
+            self.flush()
+
+    def clear(self):
+        self.timer.stop()
+        self.pending.clear()
+        self.in_flight = None
+
+
+class DeviceStateCache:
+    def __init__(self, client=None, ttl=DEVICE_STATE_TTL):
+        self.client = client
+        self.ttl = ttl
+        self.states = {}
+        self.fetched = {}
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def session(self, target):
+        serial = device_serial(target)
+        with self.lock:
+            if serial not in self.sessions:
+                self.sessions[serial] = AdbServerShellSession(self.client, serial) if self.client else AdbShellSession(serial)
+            return self.sessions[serial]
+
+    def stale(self, target):
+        now = time.monotonic()
+        with self.lock:
+            fetched = self.fetched.get(target, {})
+            return [field for field in DEVICE_STATE_QUERIES if field not in fetched or now - fetched[field] >= self.ttl]
+
+    def invalidate(self, target, fields=None):
+        with self.lock:
+            fetched = self.fetched.get(target, {})
+            for field in fields or list(fetched):
+                fetched.pop(field, None)
+
+    def snapshot(self, target, force=False):
+        fields = list(DEVICE_STATE_QUERIES) if force else self.stale(target)
+        if fields:
+            command = "; ".join(f"echo @state:{field}; {DEVICE_STATE_QUERIES[field]}" for field in fields)
+            state = parse_device_state(self.session(target).run(command).splitlines())
+            now = time.monotonic()
+            with self.lock:
+                current = self.states.setdefault(target, {})
+                for field in fields:
+                    for key in DEVICE_STATE_KEYS[field]:
+                        current[key] = state.get(key)
+                    self.fetched.setdefault(target, {})[field] = now
+        with self.lock:
+            return dict(self.states.get(target, {}))
+
+    def close(self):
+        with self.lock:
+            sessions = list(self.sessions.values())
+            self.sessions = {}
+        for session in sessions:
+            session.close()
+
+
+class AppIndex:
+    def __init__(self, packages=()):
+        self.packages = sorted(packages)
+        self.tokens = sorted({(token, package) for package in self.packages for token in [package.lower()] + package.lower().split(".") if token})
+        self.keys = [token for token, package in self.tokens]
+
+    def search(self, query, limit=APP_SEARCH_LIMIT):
+        query = query.strip().lower()
+        if not query:
+            return self.packages[:limit]
+        matches = []
+        for token, package in self.tokens[bisect.bisect_left(self.keys, query):]:
+            if not token.startswith(query) or len(matches) >= limit:
+                break
+            if package not in matches:
+                matches.append(package)
+        if len(matches) < limit:
+            scored = [(fuzzy_score(query, package.lower()), package) for package in self.packages if package not in matches]
+            matches += [package for score, package in sorted(item for item in scored if item[0] is not None)]
+        return matches[:limit]
+
+
+class AppCatalog:
+    def __init__(self, run_adb, cache_dir=os.path.join(CONFIG_DIR, "apps"), ttl=APP_CACHE_TTL):
+        self.run_adb = run_adb
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.entries = {}
+
+    def cache_path(self, serial):
+        return os.path.join(self.cache_dir, "".join(char if char.isalnum() or char in ".-" else "_" for char in serial) + ".json")
+
+    def cached(self, serial):
+        if serial not in self.entries:
+            try:
+                with open(self.cache_path(serial), "r", encoding="utf-8") as f:
+                    self.entries[serial] = json.load(f)
+            except (OSError, ValueError):
+                return None
+        return self.entries[serial]
+
+    def shell(self, serial, command):
+        return self.run_adb(["-s", serial, "shell", command], 30)
+
+    def query_commands(self, packages=None):
+        if packages is None:
+            return [f"cmd package query-activities --brief -a android.intent.action.MAIN -c {category}" for category in LAUNCHER_CATEGORIES]
+        return [f"cmd package resolve-activity --brief -a android.intent.action.MAIN -c {category} {package}" for package in packages for category in LAUNCHER_CATEGORIES]
+
+    def refresh(self, serial, force=False):
+        entry = self.cached(serial)
+        now = time.time()
+        if entry is not None and not force and now - entry["fetched"] < self.ttl:
+            return entry["apps"]
+        if entry is None:
+            output = self.shell(serial, "; ".join(["pm list packages"] + self.query_commands()))
+            packages = parse_packages(output)
+            apps = parse_components(output)
+        else:
+            packages = parse_packages(self.shell(serial, "pm list packages"))
+            known = set(entry["packages"])
+            added = [package for package in packages if package not in known]
+            apps = dict(entry["apps"])
+            if len(added) > APP_INCREMENTAL_MAX:
+                apps.update(parse_components(self.shell(serial, "; ".join(self.query_commands()))))
+            elif added:
+                apps.update(parse_components(self.shell(serial, "; ".join(self.query_commands(added)))))
+        if not packages:
+            return entry["apps"] if entry is not None else {}
+        package_set = set(packages)
+        apps = {package: component for package, component in apps.items() if package in package_set}
+        entry = {"fetched": now, "packages": packages, "apps": apps}
+        self.entries[serial] = entry
+        with contextlib.suppress(OSError):
+            write_json_atomic(self.cache_path(serial), entry)
+        return apps
+
+
+class ConfigStore:
+    def __init__(self, config_dir=CONFIG_DIR, write_delay=CONFIG_WRITE_DELAY):
+        self.paths = {
+            "ips": os.path.join(config_dir, "ips.json"),
+            "language": os.path.join(config_dir, "language.json"),
+            "translations": os.path.join(config_dir, "translations.json"),
+            "settings": os.path.join(config_dir, "settings.json"),
+        }
+        self.defaults = {
+            "ips": {"ip_addresses": []},
+            "language": {"language": "English"},
+            "translations": DEFAULT_TRANSLATIONS,
+            "settings": {"key_repeat_interval_ms": KEY_REPEAT_INTERVAL_MS, "key_repeat_delay_ms": KEY_REPEAT_DELAY_MS},
+        }
+        self.write_delay = write_delay
+        self.data = {}
+        self.missing = []
+        self.errors = {}
+        self.dirty = set()
+        self.lock = threading.RLock()
+        self.write_timer = None
+
+    def load(self):
+        for section, path in self.paths.items():
+            data = self.read(section)
+            if data is None:
+                if section not in self.errors:
+                    self.missing.append(section)
+                data = copy.deepcopy(self.defaults[section])
+            self.data[section] = data
+        return self
+
+    def read(self, section):
+        path = self.paths[section]
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            self.errors[section] = f"{path}: {e}"
+            return None
+        self.errors.pop(section, None)
+        return data
+
+    def reload(self, section):
+        data = self.read(section)
+        with self.lock:
+            if data is None or section in self.dirty or data == self.data[section]:
+                return False
+            self.data[section] = data
+            return True
+
+    def section_for(self, path):
+        for section, section_path in self.paths.items():
+            if os.path.normcase(os.path.abspath(path)) == os.path.normcase(os.path.abspath(section_path)):
+                return section
+        return None
+
+    def ip_addresses(self):
+        return self.data["ips"].setdefault("ip_addresses", [])
+
+    def groups(self):
+        return self.data["ips"].get("groups", {})
+
+    def add_ip(self, ip):
+        with self.lock:
+            if not ip or ip in self.ip_addresses():
+                return False
+            self.ip_addresses().append(ip)
+        self.mark_dirty("ips")
+        return True
+
+    def language(self):
+        return self.data["language"].get("language", "English")
+
+    def setting_int(self, key, minimum=0):
+        default = self.defaults["settings"][key]
+        try:
+            return max(minimum, int(self.data["settings"].get(key, default)))
+        except (TypeError, ValueError):
+            return default
+
+    def key_repeat_interval(self):
+        return self.setting_int("key_repeat_interval_ms", 20)
+
+    def key_repeat_delay(self):
+        return self.setting_int("key_repeat_delay_ms")
+
+    def set_language(self, language):
+        with self.lock:
+            if self.language() == language:
+                return
+            self.data["language"]["language"] = language
+        self.mark_dirty("language")
+
+    def translations(self):
+        return self.data["translations"]
+
+    def translate(self, key):
+        lang = self.language()
+        default = DEFAULT_TRANSLATIONS.get(lang, DEFAULT_TRANSLATIONS["English"]).get(key, key)
+        return self.translations().get(lang, {}).get(key, default)
+
+    def mark_dirty(self, section):
+        with self.lock:
+            self.dirty.add(section)
+            if self.write_timer is not None:
+                self.write_timer.cancel()
+            self.write_timer = threading.Timer(self.write_delay, self.flush)
+            self.write_timer.daemon = True
+            self.write_timer.start()
+
+    def write_missing(self):
+        with self.lock:
+            self.dirty.update(self.missing)
+            self.missing = []
+        self.flush()
+
+    def flush(self):
+        with self.lock:
+            if self.write_timer is not None:
+                self.write_timer.cancel()
+                self.write_timer = None
+            pending = {section: json.dumps(self.data[section], indent=4, ensure_ascii=False) for section in self.dirty if section not in self.errors}
+            self.dirty.clear()
+            for section, text in pending.items():
+                write_json_atomic(self.paths[section], text)
+
+
+class MacroRecorder:
+    def __init__(self, macros_file):
+        self.macros_file = macros_file
+        self.macros = {}
+        self.steps = []
+        self.recording = False
+        self.last_step = 0.0
+        self.error = None
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.macros_file):
+            return
+        try:
+            with open(self.macros_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            self.error = f"{self.macros_file}: {e}"
+            return
+        if isinstance(data, dict) and isinstance(data.get("macros"), dict):
+            self.macros = data["macros"]
+        else:
+            self.error = f"{self.macros_file}: no \"macros\" object"
+
+    def start(self):
+        self.steps = []
+        self.recording = True
+        self.last_step = time.perf_counter()
+
+    def record(self, keycode):
+        if not self.recording:
+            return
+        now = time.perf_counter()
+        self.steps.append({"key": keycode, "delay": round(now - self.last_step, 3) if self.steps else 0.0})
+        self.last_step = now
+
+    def stop(self, name=None):
+        self.recording = False
+        steps, self.steps = self.steps, []
+        if name and steps:
+            self.macros[name] = steps
+            self.save()
+        return steps
+
+    def delete(self, name):
+        if self.macros.pop(name, None) is not None:
+            self.save()
+
+    def save(self):
+        if self.error is not None:
+            return
+        write_json_atomic(self.macros_file, {"macros": self.macros}, ensure_ascii=False)
+
+    def compile(self, name, timed=False):
+        steps = self.macros.get(name, [])
+        if not steps:
+            return None, 0.0
+        if not timed:
+            return "input keyevent " + " ".join(step["key"] for step in steps), 0.0
+        commands = []
+        duration = 0.0
+        for step in steps:
+            if step["delay"] > 0:
+                commands.append(f"sleep {step['delay']:.3f}")
+                duration += step["delay"]
+            commands.append(f"input keyevent {step['key']}")
+        return "; ".join(commands), duration
+
+
+class StartupProfiler:
+    def __init__(self, enabled=False, started=STARTUP_STARTED):
+        self.enabled = enabled
+        self.started = started
+        self.last = started
+        self.phases = []
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def report(self):
+        if not self.enabled:
+            return
+        for name, seconds in self.phases:
+            print(f"{name:<24}{seconds * 1000:>9.1f} ms")
+        print(f"{'time to interactive':<24}{(self.last - self.started) * 1000:>9.1f} ms")
+
+
+class Win10ToastBackend:
+    def __init__(self, duration=NOTIFICATION_DURATION):
+        self.duration = duration
+        self.toaster = None
+
+    def show(self, title, message):
+        if self.toaster is None:
+            self.toaster = importlib.import_module("win10toast").ToastNotifier()
+        self.toaster.show_toast(title, message, duration=self.duration, threaded=False)
+
+
+class NotifySendBackend:
+    def __init__(self, duration=NOTIFICATION_DURATION):
+        self.duration = duration
+
+    def show(self, title, message):
+        subprocess.run(["notify-send", "-a", "Android TV Remote", "-t", str(self.duration * 1000), title, message], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=self.duration)
+
+
+class NullBackend:
     def __init__(self):
+        self.shown = collections.deque(maxlen=NOTIFICATION_QUEUE_SIZE)
+
+    def show(self, title, message):
+        self.shown.append((title, message))
+
+
+def make_notification_backend(name=NOTIFICATION_BACKEND):
+    if name == "auto":
+        if os.name == "nt" and importlib.util.find_spec("win10toast") is not None:
+            name = "win10toast"
+        elif shutil.which("notify-send"):
+            name = "notify-send"
+        else:
+            name = "null"
+    if name == "win10toast":
+        return Win10ToastBackend()
+    if name == "notify-send":
+        return NotifySendBackend()
+    return NullBackend()
+
+
+class NotificationDispatcher:
+    def __init__(self, backend=None, min_interval=NOTIFICATION_MIN_INTERVAL, dedup_window=NOTIFICATION_DEDUP_WINDOW, size=NOTIFICATION_QUEUE_SIZE):
+        self.backend = backend or make_notification_backend()
+        self.min_interval = min_interval
+        self.dedup_window = dedup_window
+        self.queue = queue.Queue(size)
+        self.lock = threading.Lock()
+        self.last_event = {}
+        self.last_message = {}
+        self.stats = {"shown": 0, "duplicate": 0, "rate_limited": 0, "dropped": 0, "failed": 0}
+        self.worker = None
+
+    def notify(self, event, title, message):
+        now = time.monotonic()
+        with self.lock:
+            self.last_message = {key: sent for key, sent in self.last_message.items() if now - sent < self.dedup_window}
+            if (title, message) in self.last_message:
+                self.stats["duplicate"] += 1
+                return False
+            if now - self.last_event.get(event, -self.min_interval) < self.min_interval:
+                self.stats["rate_limited"] += 1
+                return False
+            try:
+                self.queue.put_nowait((title, message))
+            except queue.Full:
+                self.stats["dropped"] += 1
+                return False
+            self.last_event[event] = now
+            self.last_message[(title, message)] = now
+            if self.worker is None:
+                self.worker = threading.Thread(target=self.run, daemon=True)
+                self.worker.start()
+        return True
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            try:
+                self.backend.show(*item)
+                self.stats["shown"] += 1
+            except Exception:
+                self.stats["failed"] += 1
+
+    def close(self):
+        with self.lock:
+            if self.worker is None:
+                return
+            while True:
+                try:
+                    self.queue.put_nowait(None)
+                    break
+                except queue.Full:
+                    with contextlib.suppress(queue.Empty):
+                        self.queue.get_nowait()
+            self.worker = None
+
+
+class RemoteDaemon:
+    def __init__(self, config_dir=CONFIG_DIR, backend=ADB_BACKEND):
+        self.config = ConfigStore(config_dir).load()
+        self.adb_client = AdbServerClient() if backend == "socket" else None
+        self.registry = DeviceRegistry(self.adb_client)
+        self.latency = LatencyRecorder()
+        self.text_injector = TextInjector(self.run_shell)
+        self.current_device_ip = None
+        self.registry.load(self.config.data["ips"])
+
+    def run_adb(self, args, timeout=20):
+        if self.adb_client is not None:
+            output = self.adb_client.run(args, timeout)
+            if output is not None:
+                return output
+        return run_adb_process(args, timeout, recorder=self.latency)
+
+    def resolve_target(self, target=None):
+        target = target or self.current_device_ip
+        if target is None:
+            raise ValueError("no device selected; connect to a device or pass a target")
+        return target
+
+    def run_shell(self, command, target=None, timeout=10):
+        with self.latency.measure("shell.roundtrip"):
+            return "".join(self.registry.run(self.resolve_target(target), command, timeout).values())
+
+    def run_checked(self, command, target=None, timeout=10):
+        with self.latency.measure("shell.roundtrip"):
+            results = self.registry.run(self.resolve_target(target), f"{command} && echo {DAEMON_OK_MARKER}", timeout)
+        failed = {serial: output.strip() for serial, output in results.items() if DAEMON_OK_MARKER not in output}
+        return {"ok": bool(results) and not failed, "devices": sorted(results), "failed": failed}
+
+    def warm_up(self):
+        import concurrent.futures
+        ips = list(self.config.ip_addresses())
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(32, len(ips)))) as pool:
+            for ip, rtt in zip(ips, pool.map(probe_host, ips)):
+                if rtt is not None:
+                    pool.submit(self.connect, ip)
+
+    def connect(self, ip):
+        output = self.run_adb(["connect", ip])
+        connected = "connected" in output.lower()
+        if connected:
+            self.registry.reset(ip)
+            self.registry.session(ip).run("true")
+            if self.current_device_ip is None:
+                self.current_device_ip = ip
+        return {"ok": connected, "output": output.strip()}
+
+    def disconnect(self, ip=None):
+        ip = ip or self.current_device_ip
+        if not ip:
+            return {"ok": False, "output": "no device"}
+        output = self.run_adb(["disconnect", ip])
+        self.registry.reset(ip)
+        if ip == self.current_device_ip:
+            self.current_device_ip = None
+        disconnected = "disconnected" in output.lower() and not output.lower().startswith("error")
+        return {"ok": disconnected, "output": output.strip()}
+
+    def send_key(self, keys, target=None):
+        keycodes = [normalize_keycode(key) for key in keys.split()]
+        with self.latency.measure("daemon.key"):
+            return self.run_checked("input keyevent " + " ".join(keycodes), target)
+
+    def send_text(self, text, target=None):
+        target = self.resolve_target(target)
+        started = time.perf_counter()
+        commands, method, dropped = self.text_injector.build_commands(text, self.text_injector.probe(target))
+        result = self.run_checked(" && ".join(commands) if commands else "true", target)
+        elapsed = time.perf_counter() - started
+        self.latency.record("text.send", elapsed)
+        if not result["ok"]:
+            self.text_injector.forget(target)
+        result.update({"chars_per_second": len(text) / elapsed if elapsed > 0 else 0.0, "method": method, "dropped": dropped})
+        return result
+
+    def status(self):
+        return {"ok": True, "current_device": self.current_device_ip, "devices": self.registry.resolve("all"), "latency": self.latency.summary()}
+
+    def handle(self, action, request):
+        if action == "key":
+            return self.send_key(request["key"], request.get("target"))
+        if action == "text":
+            return self.send_text(request["text"], request.get("target"))
+        if action == "connect":
+            return self.connect(request["ip"])
+        if action == "disconnect":
+            return self.disconnect(request.get("ip"))
+        if action == "status":
+            return self.status()
+        return {"ok": False, "output": f"unknown action {action}"}
+
+    def serve(self, host=DAEMON_HOST, port=DAEMON_PORT):
+        from http.server import ThreadingHTTPServer
+        handler = daemon_handler(self, create_daemon_token())
+        threading.Thread(target=self.warm_up, daemon=True).start()
+        server = ThreadingHTTPServer((host, port), handler)
+        server.daemon_threads = True
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            self.registry.close()
+            if self.adb_client is not None:
+                self.adb_client.close()
+
+
+def daemon_handler(daemon, token):
+    from http.server import BaseHTTPRequestHandler
+
+    class DaemonRequestHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+        remote = daemon
+        expected_token = token
+
+        def rejection(self):
+            if self.headers.get("Origin") is not None:
+                return "cross-origin requests are not accepted"
+            host = self.headers.get("Host", "")
+            if host.rsplit(":", 1)[0] not in DAEMON_LOOPBACK_HOSTS:
+                return "requests must use a loopback host"
+            authorization = self.headers.get("Authorization", "")
+            if not self.expected_token or not secrets.compare_digest(authorization, f"Bearer {self.expected_token}"):
+                return "missing or wrong token; read it from daemon.token"
+            return None
+
+        def do_GET(self):
+            rejection = self.rejection()
+            if rejection is not None:
+                self.reject(403, rejection)
+                return
+            if self.path.strip("/") != "status":
+                self.reject(405, "use POST")
+                return
+            self.respond("status", {})
+
+        def do_POST(self):
+            rejection = self.rejection()
+            if rejection is not None:
+                self.reject(403, rejection)
+                return
+            if self.headers.get("Content-Type", "").split(";")[0].strip().lower() != "application/json":
+                self.reject(415, "Content-Type must be application/json")
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                request = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self.send_json(400, {"ok": False, "output": "invalid json"})
+                return
+            self.respond(self.path.strip("/"), request)
+
+        def respond(self, action, request):
+            try:
+                result = self.remote.handle(action, request)
+            except KeyError as e:
+                self.send_json(400, {"ok": False, "output": f"missing field {e}"})
+                return
+            except ValueError as e:
+                self.send_json(400, {"ok": False, "output": str(e)})
+                return
+            self.send_json(200 if result.get("ok") else 400, result)
+
+        def reject(self, code, message):
+            self.close_connection = True
+            self.send_json(code, {"ok": False, "output": message})
+
+        def send_json(self, code, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return DaemonRequestHandler
+
+
+def create_daemon_token(path=DAEMON_TOKEN_FILE):
+    token = secrets.token_hex(16)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path)
+    with os.fdopen(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "w") as f:
+        f.write(token)
+    return token
+
+
+class AndroidTVRemote(QWidget):
+    def __init__(self, profiler=None):
         super().__init__()
+        self.profiler = profiler or StartupProfiler()
         if hasattr(sys, '_MEIPASS'):
             icon_path = os.path.join(sys._MEIPASS, 'icon', 'icon.ico')
         else:
             icon_path = os.path.join(os.path.dirname(__file__), 'icon', 'icon.ico')
         self.setWindowIcon(QIcon(icon_path))
-        self.toaster = win10toast.ToastNotifier()
+        self.notifier = NotificationDispatcher()
         self.setWindowTitle("Android TV Remote")
         self.setFixedSize(300, 600)
         self.setStyleSheet("background-color: #111; color: #ccc;")
         self.current_device_ip = None
+        self.adb_client = AdbServerClient() if ADB_BACKEND == "socket" else None
+        self.shell_session = self.adb_client.session() if self.adb_client else AdbShellSession()
+        self.device_registry = DeviceRegistry(self.adb_client)
+        self.target = None
+        self.latency = LatencyRecorder()
+        self.adb_executor = AdbCommandExecutor(self.run_adb, self.run_shell, recorder=self.latency, name="control", parent=self)
+        self.input_executor = AdbCommandExecutor(self.run_adb, self.run_shell, max_pending=64, default_timeout=5, recorder=self.latency, name="input", parent=self)
+        self.connection_state = None
+        self.connection_monitor = ConnectionMonitor(self.adb_executor, self.adb_client, recorder=self.latency, parent=self)
+        self.connection_monitor.devices_changed.connect(self.update_connection_status)
+        self.text_injector = TextInjector(self.run_shell)
+        self.device_state = DeviceStateCache(self.adb_client)
+        self.device_state_snapshot = {}
+        self.state_job = None
+        self.state_timer = QTimer(self)
+        self.state_timer.setSingleShot(True)
+        self.state_timer.timeout.connect(self.refresh_device_state)
+        self.monkey_backend = MonkeyInputBackend(self.run_adb, recorder=self.latency) if KEY_BACKEND == "monkey" else None
+        self.key_pipeline = KeyEventPipeline(self.input_executor, recorder=self.latency, text_builder=self.build_passthrough_text, key_injector=self.inject_keys if self.monkey_backend else None, parent=self)
+        self.passthrough = False
+        self.screen_preview = ScreenPreview(self.adb_client, recorder=self.latency, parent=self)
+        self.screen_preview.frame_ready.connect(self.on_preview_frame)
+        self.transfers = TransferManager(self.adb_client, recorder=self.latency, parent=self)
+        self.transfers.progress.connect(self.on_transfer_progress)
+        self.transfers.finished.connect(self.on_transfer_finished)
+        self.transfer_progress = {}
+        self.transfer_results = []
+        self.reachability_scanner = ReachabilityScanner(parent=self)
+        self.reachability_scanner.host_probed.connect(self.on_host_probed)
+        self.reachability = {}
+        self.discovery_engine = DiscoveryEngine(parent=self)
+        self.discovery_engine.device_found.connect(self.on_device_discovered)
+        self.discovered = {}
+        self.repeat_buttons = []
         
-        self.ips_file = os.path.join(os.path.expanduser("~"), "Documents", "AndroidTVController", "ips.json")
-        self.ips = self.load_ips()
-        
-        self.language_file = os.path.join(os.path.expanduser("~"), "Documents", "AndroidTVController", "language.json")
-        self.language = self.load_language()
+        self.profiler.mark("services")
 
-        self.translations_file = os.path.join(os.path.expanduser("~"), "Documents", "AndroidTVController", "translations.json")
-        self.translations = self.load_translations()
-
-        self.create_howto_file()
+        self.config = ConfigStore().load()
+        self.device_registry.load(self.config.data["ips"])
+        self.macro_recorder = MacroRecorder(os.path.join(CONFIG_DIR, "macros.json"))
+        self.app_catalog = AppCatalog(self.run_adb)
+        self.app_index = AppIndex()
+        self.apps = {}
+        self.profiler.mark("config")
 
         self.init_ui()
+        self.set_key_repeat_rate(self.config.key_repeat_interval(), self.config.key_repeat_delay())
         self.text_input.setFocus()
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.check_connection_status)
-        self.timer.start(3000)
-        self.check_connection_status()
+        self.update_connection_status()
+        self.profiler.mark("ui")
+        QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        self.profiler.mark("first paint")
+        self.connection_monitor.start()
+        self.reconnect_all()
+        self.config.write_missing()
+        errors = list(self.config.errors.values()) + ([self.macro_recorder.error] if self.macro_recorder.error else [])
+        if errors:
+            self.show_notification("config_error", "\n".join(errors))
+        self.create_howto_file()
+        self.config_watcher = QFileSystemWatcher([path for path in self.config.paths.values() if os.path.exists(path)], self)
+        self.config_watcher.fileChanged.connect(self.on_config_file_changed)
+        self.profiler.mark("background startup")
+        self.profiler.report()
 
     def check_connection_status(self):
-        output = self.run_adb(["get-state"])
-        if "device" in output.lower():
+        self.connection_monitor.refresh()
+        self.update_connection_status()
+
+    def is_connected(self):
+        devices = self.connection_monitor.devices
+        if self.current_device_ip:
+            return devices.get(device_serial(self.current_device_ip)) == "device"
+        return "device" in devices.values()
+
+    def update_connection_status(self, devices=None, notify=True):
+        state = (self.is_connected(), self.current_device_ip)
+        if state == self.connection_state:
+            return
+        previous = self.connection_state
+        self.connection_state = state
+        self.device_state_snapshot = {}
+        self.refresh_status_label()
+        if state[0]:
+            self.refresh_device_state()
+        else:
+            self.state_timer.stop()
+        if not notify or previous is None and not state[0]:
+            return
+        if state[0]:
+            self.show_notification("status_connected", f"{self.translate('status_connected')} {self.current_device_ip}")
+        elif previous[1]:
+            self.show_notification("status_disconnected", f"{self.translate('status_disconnected')} {previous[1]}")
+
+    def refresh_status_label(self):
+        if self.connection_state and self.connection_state[0]:
             self.status.setText(f"{self.translate('status_connected')} {self.current_device_ip}")
             self.status.setStyleSheet("color: green; font-size: 16px;")
-            self.show_notification(self.translate("status_connected"), f"{self.translate('status_connected')} {self.current_device_ip}")
         else:
-            if self.current_device_ip:
-                self.show_notification(self.translate("status_disconnected"), f"{self.translate('status_disconnected')} {self.current_device_ip}")
             self.status.setText(self.translate("status_disconnected"))
             self.status.setStyleSheet("color: gray; font-size: 16px;")
-
-    def load_ips(self):
-        if not os.path.exists(self.ips_file):
-            default_ips = {"ip_addresses": []}
-            self.save_ips(default_ips)
-            return default_ips
+        self.state_label.setText(self.format_device_state(self.device_state_snapshot))
+
+    def format_device_state(self, state):
+        parts = []
+        if state.get("screen") is not None:
+            parts.append(self.translate("screen_on") if state["screen"] else self.translate("screen_off"))
+        if state.get("muted"):
+            parts.append(self.translate("muted"))
+        elif state.get("volume") is not None:
+            volume_max = f"/{state['volume_max']}" if state.get("volume_max") else ""
+            parts.append(f"{self.translate('volume')} {state['volume']}{volume_max}")
+        if state.get("foreground"):
+            parts.append(state["foreground"])
+        return " · ".join(parts)
+
+    def refresh_device_state(self):
+        ip = self.current_device_ip
+        if not ip or not (self.connection_state and self.connection_state[0]) or (self.state_job is not None and not self.state_job.done and not self.state_job.cancelled):
+            return
+        self.state_job = self.adb_executor.submit_call(lambda: self.device_state.snapshot(ip), lambda state: self.on_device_state(ip, state))
+
+    def on_device_state(self, ip, state):
+        self.state_job = None
+        if ip == self.current_device_ip and self.connection_state and self.connection_state[0]:
+            self.device_state_snapshot = state
+            self.refresh_status_label()
+
+    def invalidate_device_state(self, fields):
+        if self.current_device_ip and self.connection_state and self.connection_state[0]:
+            self.device_state.invalidate(self.current_device_ip, fields)
+            self.state_timer.start(DEVICE_STATE_DELAY_MS)
+
+    def on_config_file_changed(self, path):
+        if os.path.exists(path) and path not in self.config_watcher.files():
+            self.config_watcher.addPath(path)
+        section = self.config.section_for(path)
+        if section is None or not self.config.reload(section):
+            return
+        if section == "ips":
+            self.device_registry.load(self.config.data["ips"])
+            self.sync_history_list()
+            self.refresh_target_select()
+        elif section == "settings":
+            self.set_key_repeat_rate(self.config.key_repeat_interval(), self.config.key_repeat_delay())
         else:
-            with open(self.ips_file, "r") as f:
-                return json.load(f)
-
-    def save_ips(self, ips):
-        os.makedirs(os.path.dirname(self.ips_file), exist_ok=True)
-        with open(self.ips_file, "w") as f:
-            json.dump(ips, f, indent=4)
-
-    def load_language(self):
-        if not os.path.exists(self.language_file):
-            default_language = {"language": "English"}
-            self.save_language(default_language)
-            return default_language
-        else:
-            with open(self.language_file, "r") as f:
-                return json.load(f)
-
-    def save_language(self, language):
-        os.makedirs(os.path.dirname(self.language_file), exist_ok=True)
-        with open(self.language_file, "w") as f:
-            json.dump(language, f, indent=4)
-
-    def load_translations(self):
-        default_translations = {
-            "Español": {
-                "status_disconnected": "● Desconectado",
-                "status_connected": "● Conectado",
-                "text_input_placeholder": "Texto a enviar",
-                "send": "Enviar",
-                "connect_to_ip": "Conectar a IP",
-                "connect": "Conectar",
-                "disconnect_device": "Desconectar dispositivo",
-                "previous_connections": "Conexiones previas:",
-                "no_previous_connections": "Sin conexiones previas.",
-                "language": "Idioma:",
-                "close_settings": "Cerrar ajustes",
-                "connection_success": "Conexión exitosa",
-                "connection_error": "Error de conexión",
-                "disconnected": "Desconectado"
-            },
-            "English": {
-                "status_disconnected": "● Disconnected",
-                "status_connected": "● Connected",
-                "text_input_placeholder": "Text to send",
-                "send": "Send",
-                "connect_to_ip": "Connect to IP",
-                "connect": "Connect",
-                "disconnect_device": "Disconnect device",
-                "previous_connections": "Previous connections:",
-                "no_previous_connections": "No previous connections.",
-                "language": "Language:",
-                "close_settings": "Close settings",
-                "connection_success": "Connection successful",
-                "connection_error": "Connection error",
-                "disconnected": "Disconnected"
-            }
-        }
-        if not os.path.exists(self.translations_file):
-            os.makedirs(os.path.dirname(self.translations_file), exist_ok=True)
-            with open(self.translations_file, "w", encoding="utf-8") as f:
-                json.dump(default_translations, f, indent=4, ensure_ascii=False)
-        with open(self.translations_file, "r", encoding="utf-8") as f:
-            return json.load(f)
+            self.sync_language_select()
+            self.update_ui_language()
 
     def translate(self, key):
-        lang = self.language["language"]
-        return self.translations.get(lang, {}).get(key, key)
+        return self.config.translate(key)
             
     def init_ui(self):
         self.status = QLabel("● Desconectado")
         self.status.setStyleSheet("color: gray; font-size: 16px;")
 
+        self.state_label = QLabel()
+        self.state_label.setStyleSheet("color: #888; font-size: 11px;")
+
+        self.transfer_label = QLabel()
+        self.transfer_label.setStyleSheet("color: #8ab4f8; font-size: 11px;")
+        self.transfer_label.hide()
+        self.setAcceptDrops(True)
+
         self.settings_btn = QPushButton("⚙")
         self.settings_btn.setFixedSize(32, 32)
         self.settings_btn.setStyleSheet("""
@@ -161,6 +2410,69 @@ class AndroidTVRemote(QWidget):
         self.settings_btn.setCursor(Qt.PointingHandCursor)
         self.settings_btn.clicked.connect(self.open_settings_overlay)
 
+        self.preview_btn = QPushButton("▣")
+        self.preview_btn.setFixedSize(32, 32)
+        self.preview_btn.setCheckable(True)
+        self.preview_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #222;
+                font-size: 18px;
+                color: white;
+                border: none;
+            }
+            QPushButton:hover {
+                background-color: #333;
+            }
+            QPushButton:checked {
+                color: #8ab4f8;
+            }
+        """)
+        self.preview_btn.setCursor(Qt.PointingHandCursor)
+        self.preview_btn.toggled.connect(self.toggle_preview)
+
+        self.apps_btn = QPushButton("▤")
+        self.apps_btn.setFixedSize(32, 32)
+        self.apps_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #222;
+                font-size: 18px;
+                color: white;
+                border: none;
+            }
+            QPushButton:hover {
+                background-color: #333;
+            }
+        """)
+        self.apps_btn.setCursor(Qt.PointingHandCursor)
+        self.apps_btn.clicked.connect(self.open_launcher)
+
+        self.passthrough_btn = QPushButton("⌨")
+        self.passthrough_btn.setFixedSize(32, 32)
+        self.passthrough_btn.setCheckable(True)
+        self.passthrough_btn.setToolTip(self.translate("keyboard_passthrough"))
+        self.passthrough_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #222;
+                font-size: 18px;
+                color: white;
+                border: none;
+            }
+            QPushButton:hover {
+                background-color: #333;
+            }
+            QPushButton:checked {
+                color: #8ab4f8;
+            }
+        """)
+        self.passthrough_btn.setCursor(Qt.PointingHandCursor)
+        self.passthrough_btn.toggled.connect(self.toggle_passthrough)
+        QShortcut(QKeySequence("Ctrl+K"), self, activated=self.passthrough_btn.toggle)
+
+        self.preview_view = self.PreviewWidget()
+        self.preview_view.setFixedSize(PREVIEW_WIDTH, PREVIEW_HEIGHT)
+        self.preview_view.setStyleSheet("background-color: #000; border: 1px solid #333;")
+        self.preview_view.hide()
+
         self.text_input = QLineEdit()
         self.text_input.setPlaceholderText(self.translate("text_input_placeholder"))
         self.text_input.setStyleSheet("padding: 8px; font-size: 14px; background-color: #333; color: #ccc;")
@@ -171,15 +2483,23 @@ class AndroidTVRemote(QWidget):
         self.send_btn.clicked.connect(self.send_text)
 
         self.controls_layout = self.build_controls()
+        macro_layout = self.build_macro_controls()
 
         main_layout = QVBoxLayout()
         top_row = QHBoxLayout()
         top_row.addWidget(self.status)
         top_row.addStretch()
+        top_row.addWidget(self.passthrough_btn)
+        top_row.addWidget(self.apps_btn)
+        top_row.addWidget(self.preview_btn)
         top_row.addWidget(self.settings_btn)
 
         main_layout.addLayout(top_row)
+        main_layout.addWidget(self.state_label)
+        main_layout.addWidget(self.transfer_label)
+        main_layout.addWidget(self.preview_view, alignment=Qt.AlignCenter)
         main_layout.addLayout(self.controls_layout)
+        main_layout.addLayout(macro_layout)
 
         bottom_layout = QHBoxLayout()
         bottom_layout.addWidget(self.text_input)
@@ -200,7 +2520,17 @@ class AndroidTVRemote(QWidget):
         self.setup_settings_overlay()
 
         self.stack.addWidget(self.overlay)
+
+        self.debug_panel = QWidget(self)
+        self.setup_debug_panel()
+        self.stack.addWidget(self.debug_panel)
+
+        self.launcher_panel = QWidget(self)
+        self.setup_launcher_panel()
+        self.stack.addWidget(self.launcher_panel)
+
         self.stack.setCurrentIndex(0)
+        self.stack.currentChanged.connect(self.on_page_changed)
         self.setLayout(self.stack)
 
     def setup_settings_overlay(self):
@@ -232,18 +2562,23 @@ class AndroidTVRemote(QWidget):
 
         history_label = QLabel(self.translate("previous_connections"))
 
-        ip_addresses = self.ips.get("ip_addresses", [])
-        if not ip_addresses:
-            ip_addresses = [self.translate("no_previous_connections")]
-
         history_list = QListWidget()
-        for ip in ip_addresses:
-            item = QListWidgetItem(ip)
-            if ip == self.translate("no_previous_connections"):
-                item.setFlags(item.flags() & ~Qt.ItemIsSelectable & ~Qt.ItemIsEnabled)
-            history_list.addItem(item)
+        self.history_list = history_list
+        self.sync_history_list()
+
+        history_list.itemDoubleClicked.connect(lambda item: self.connect_to_ip(item.data(Qt.UserRole)))
+
+        self.reconnect_all_btn = QPushButton(self.translate("reconnect_all"))
+        self.reconnect_all_btn.setStyleSheet("background-color: #444; padding: 8px; font-size: 14px;")
+        self.reconnect_all_btn.clicked.connect(self.reconnect_all)
 
-        history_list.itemDoubleClicked.connect(lambda item: self.reconnect(item.text()))
+        self.discover_btn = QPushButton(self.translate("discover"))
+        self.discover_btn.setStyleSheet("background-color: #444; padding: 8px; font-size: 14px;")
+        self.discover_btn.clicked.connect(lambda: self.discovery_engine.discover())
+
+        scan_row = QHBoxLayout()
+        scan_row.addWidget(self.reconnect_all_btn)
+        scan_row.addWidget(self.discover_btn)
 
         close_btn = QPushButton(self.translate("close_settings"))
         close_btn.setStyleSheet("background-color: #333; padding: 8px; font-size: 14px;")
@@ -263,14 +2598,8 @@ class AndroidTVRemote(QWidget):
         language_label.setStyleSheet("color: white; font-size: 14px;")
 
         language_select = QComboBox()
-        language_select.clear()
-        for lang_name, translations in self.translations.items():
-            language_select.addItem(lang_name, lang_name)
-        current_language = self.language["language"]
-        if current_language in self.translations:
-            language_select.setCurrentText(current_language)
-        else:
-            language_select.setCurrentIndex(0)
+        self.language_select = language_select
+        self.sync_language_select()
         language_select.setEditable(False)
         language_select.setStyleSheet("padding: 8px; font-size: 14px; background-color: #222; color: #ccc; border: none;")
         language_select.currentIndexChanged.connect(lambda: self.change_language(language_select.currentData()))
@@ -279,56 +2608,302 @@ class AndroidTVRemote(QWidget):
         self.overlay_layout.addWidget(language_label)
         self.overlay_layout.addWidget(language_select)
 
+        self.target_label = QLabel(self.translate("send_to"))
+        self.target_label.setStyleSheet("color: white; font-size: 14px;")
+
+        self.target_select = QComboBox()
+        self.target_select.setStyleSheet("padding: 8px; font-size: 14px; background-color: #222; color: #ccc; border: none;")
+        self.refresh_target_select()
+        self.target_select.currentIndexChanged.connect(lambda: self.change_target(self.target_select.currentData()))
+
+        self.overlay_layout.addWidget(self.target_label)
+        self.overlay_layout.addWidget(self.target_select)
+        self.overlay_layout.addLayout(scan_row)
+
         self.overlay_layout.addWidget(close_btn)
 
+        self.ip_input = ip_input
+        self.connect_btn = connect_btn
+        self.disconnect_btn = disconnect_btn
+        self.history_label = history_label
+        self.language_label = language_label
+        self.close_btn = close_btn
+
+    def sync_language_select(self):
+        names = list(self.config.translations())
+        self.language_select.blockSignals(True)
+        for index in reversed(range(self.language_select.count())):
+            if self.language_select.itemData(index) not in names:
+                self.language_select.removeItem(index)
+        for name in names:
+            if self.language_select.findData(name) < 0:
+                self.language_select.addItem(name, name)
+        self.language_select.setCurrentIndex(max(self.language_select.findData(self.config.language()), 0))
+        self.language_select.blockSignals(False)
+
+    def sync_history_list(self):
+        saved = self.config.ip_addresses()
+        ip_addresses = saved + [ip for ip in self.discovered if ip not in saved]
+        for row in reversed(range(self.history_list.count())):
+            ip = self.history_list.item(row).data(Qt.UserRole)
+            if (ip is None and ip_addresses) or (ip is not None and ip not in ip_addresses):
+                self.history_list.takeItem(row)
+        if not ip_addresses:
+            if self.history_list.count() == 0:
+                item = QListWidgetItem()
+                item.setFlags(item.flags() & ~Qt.ItemIsSelectable & ~Qt.ItemIsEnabled)
+                self.history_list.addItem(item)
+            self.history_list.item(0).setText(self.translate("no_previous_connections"))
+            return
+        present = {self.history_list.item(row).data(Qt.UserRole) for row in range(self.history_list.count())}
+        for ip in ip_addresses:
+            if ip not in present:
+                item = QListWidgetItem()
+                item.setData(Qt.UserRole, ip)
+                self.history_list.addItem(item)
+        for row in range(self.history_list.count()):
+            self.update_history_item(self.history_list.item(row))
+
+    def update_history_item(self, item):
+        ip = item.data(Qt.UserRole)
+        if ip not in self.config.ip_addresses():
+            item.setText(f"+ {ip}")
+            item.setToolTip(self.discovered.get(ip, ""))
+            item.setForeground(QColor("#8ab4f8"))
+        elif ip not in self.reachability:
+            item.setText(ip)
+        elif self.reachability[ip] is None:
+            item.setText(f"○ {ip}")
+            item.setForeground(QColor("gray"))
+        else:
+            item.setText(f"● {ip}  {self.reachability[ip] * 1000:.0f} ms")
+            item.setForeground(QColor("green"))
+
+    def on_device_discovered(self, ip, source):
+        if ip in self.discovered or ip in self.config.ip_addresses():
+            return
+        self.discovered[ip] = source
+        self.sync_history_list()
+
+    def reconnect_all(self):
+        self.reachability_scanner.scan(list(self.config.ip_addresses()))
+
+    def on_host_probed(self, ip, rtt):
+        self.reachability[ip] = rtt
+        for row in range(self.history_list.count()):
+            item = self.history_list.item(row)
+            if item.data(Qt.UserRole) == ip:
+                self.update_history_item(item)
+        if rtt is not None:
+            self.adb_executor.submit(["connect", ip], lambda output: self.on_reconnect_result(ip, output), timeout=5)
+
+    def on_reconnect_result(self, ip, output):
+        if "connected" not in output.lower():
+            return
+        self.device_registry.reset(ip)
+        if self.current_device_ip is None:
+            self.current_device_ip = ip
+        self.check_connection_status()
+
+    def refresh_target_select(self):
+        entries = [(self.translate("current_device"), None), (self.translate("all_devices"), "all")]
+        entries += [(f"▣ {group}", group) for group in self.device_registry.groups]
+        entries += [(ip, ip) for ip in self.config.ip_addresses()]
+        self.target_select.blockSignals(True)
+        for index, (text, data) in enumerate(entries):
+            if index < self.target_select.count() and self.target_select.itemData(index) == data:
+                if self.target_select.itemText(index) != text:
+                    self.target_select.setItemText(index, text)
+                continue
+            existing = self.target_select.findData(data) if data is not None else -1
+            if existing > index:
+                self.target_select.removeItem(existing)
+            self.target_select.insertItem(index, text, data)
+        while self.target_select.count() > len(entries):
+            self.target_select.removeItem(self.target_select.count() - 1)
+        index = self.target_select.findData(self.target)
+        self.target_select.setCurrentIndex(max(index, 0))
+        self.target_select.blockSignals(False)
+
+    def change_target(self, target):
+        self.target = target
+        self.key_pipeline.clear()
+
+    def setup_debug_panel(self):
+        debug_layout = QVBoxLayout(self.debug_panel)
+
+        self.latency_label = QLabel()
+        self.latency_label.setStyleSheet("font-family: Consolas, monospace; font-size: 11px; color: #ccc;")
+        self.latency_label.setAlignment(Qt.AlignTop | Qt.AlignLeft)
+
+        self.export_btn = QPushButton(self.translate("export"))
+        self.export_btn.setStyleSheet("background-color: #444; padding: 8px; font-size: 14px;")
+        self.export_btn.clicked.connect(self.export_latency)
+
+        self.debug_close_btn = QPushButton(self.translate("close_settings"))
+        self.debug_close_btn.setStyleSheet("background-color: #333; padding: 8px; font-size: 14px;")
+        self.debug_close_btn.clicked.connect(self.close_settings_overlay)
+
+        debug_layout.addWidget(self.latency_label, 1)
+        debug_layout.addWidget(self.export_btn)
+        debug_layout.addWidget(self.debug_close_btn)
+
+        self.debug_timer = QTimer(self)
+        self.debug_timer.timeout.connect(self.refresh_debug_panel)
+        QShortcut(QKeySequence("F12"), self, activated=self.toggle_debug_panel)
+
+    def toggle_debug_panel(self):
+        if self.stack.currentIndex() == 2:
+            self.close_settings_overlay()
+            return
+        self.refresh_debug_panel()
+        self.stack.setCurrentIndex(2)
+        self.debug_timer.start(1000)
+
+    def refresh_debug_panel(self):
+        sessions = self.latency_report()["sessions"]
+        restarts = ", ".join(f"{name} {stats['restarts']}" for name, stats in sessions.items())
+        self.latency_label.setText(f"{self.latency.format_summary(sessions)}\n\n{self.translate('session_restarts')}: {restarts}")
+
+    def setup_launcher_panel(self):
+        launcher_layout = QVBoxLayout(self.launcher_panel)
+
+        self.app_search = QLineEdit()
+        self.app_search.setPlaceholderText(self.translate("search_apps"))
+        self.app_search.setStyleSheet("padding: 8px; font-size: 14px; background-color: #222; color: #ccc;")
+        self.app_search.textChanged.connect(self.filter_apps)
+        self.app_search.returnPressed.connect(self.launch_first_app)
+
+        self.app_list = QListWidget()
+        self.app_list.itemActivated.connect(lambda item: self.launch_app(item.data(Qt.UserRole)))
+
+        self.refresh_apps_btn = QPushButton(self.translate("refresh"))
+        self.refresh_apps_btn.setStyleSheet("background-color: #444; padding: 8px; font-size: 14px;")
+        self.refresh_apps_btn.clicked.connect(lambda: self.refresh_apps(force=True))
+
+        self.launcher_close_btn = QPushButton(self.translate("close_settings"))
+        self.launcher_close_btn.setStyleSheet("background-color: #333; padding: 8px; font-size: 14px;")
+        self.launcher_close_btn.clicked.connect(self.close_settings_overlay)
+
+        launcher_layout.addWidget(self.app_search)
+        launcher_layout.addWidget(self.app_list, 1)
+        launcher_layout.addWidget(self.refresh_apps_btn)
+        launcher_layout.addWidget(self.launcher_close_btn)
+
+    def open_launcher(self):
+        if self.current_device_ip:
+            entry = self.app_catalog.cached(device_serial(self.current_device_ip))
+            self.set_apps(entry["apps"] if entry is not None else {})
+            self.refresh_apps()
+        self.stack.setCurrentIndex(3)
+        self.app_search.setFocus()
+
+    def refresh_apps(self, force=False):
+        ip = self.current_device_ip
+        if ip:
+            self.adb_executor.submit_call(lambda: self.app_catalog.refresh(device_serial(ip), force), lambda apps: self.on_apps_loaded(ip, apps))
+
+    def on_apps_loaded(self, ip, apps):
+        if ip == self.current_device_ip:
+            self.set_apps(apps)
+
+    def set_apps(self, apps):
+        if apps == self.apps:
+            return
+        self.apps = apps
+        self.app_index = AppIndex(apps)
+        self.filter_apps(self.app_search.text())
+
+    def filter_apps(self, text):
+        self.app_list.clear()
+        for package in self.app_index.search(text):
+            item = QListWidgetItem(package)
+            item.setData(Qt.UserRole, package)
+            self.app_list.addItem(item)
+
+    def launch_first_app(self):
+        if self.app_list.count():
+            self.launch_app(self.app_list.item(0).data(Qt.UserRole))
+
+    def launch_app(self, package):
+        component = self.apps.get(package)
+        if component:
+            self.adb_executor.submit(["shell", "am", "start", "-n", component])
+            self.invalidate_device_state(("foreground",))
+            self.app_search.clear()
+            self.close_settings_overlay()
+
+    def export_latency(self):
+        self.latency.export(os.path.join(CONFIG_DIR, "latency.json"))
+
     def change_language(self, lang):
-        self.language["language"] = lang
-        self.save_language(self.language)
+        self.config.set_language(lang)
 
     def update_ui_language(self):
-        self.status.setText(self.translate("status_disconnected"))
+        self.refresh_status_label()
         self.text_input.setPlaceholderText(self.translate("text_input_placeholder"))
         self.send_btn.setText(self.translate("send"))
         self.overlay_status.setText(self.translate("status_disconnected"))
-        self.overlay_layout.itemAt(1).widget().setPlaceholderText(self.translate("connect_to_ip"))
-        self.overlay_layout.itemAt(2).widget().setText(self.translate("connect"))
-        self.overlay_layout.itemAt(3).widget().setText(self.translate("disconnect_device"))
-        self.overlay_layout.itemAt(4).widget().setText(self.translate("previous_connections"))
-        self.overlay_layout.itemAt(8).widget().setText(self.translate("close_settings"))
-        self.overlay_layout.itemAt(6).widget().setText(self.translate("language"))
-        self.overlay_layout.itemAt(5).widget().clear()
-        ip_addresses = self.ips.get("ip_addresses", [])
-        if not ip_addresses:
-            ip_addresses = [self.translate("no_previous_connections")]
-
-        for ip in ip_addresses:
-            item = QListWidgetItem(ip)
-            if ip == self.translate("no_previous_connections"):
-                item.setFlags(item.flags() & ~Qt.ItemIsSelectable & ~Qt.ItemIsEnabled)
-            self.overlay_layout.itemAt(5).widget().addItem(item)
+        self.ip_input.setPlaceholderText(self.translate("connect_to_ip"))
+        self.connect_btn.setText(self.translate("connect"))
+        self.disconnect_btn.setText(self.translate("disconnect_device"))
+        self.history_label.setText(self.translate("previous_connections"))
+        self.close_btn.setText(self.translate("close_settings"))
+        self.language_label.setText(self.translate("language"))
+        self.target_label.setText(self.translate("send_to"))
+        self.reconnect_all_btn.setText(self.translate("reconnect_all"))
+        self.discover_btn.setText(self.translate("discover"))
+        self.app_search.setPlaceholderText(self.translate("search_apps"))
+        self.refresh_apps_btn.setText(self.translate("refresh"))
+        self.passthrough_btn.setToolTip(self.translate("keyboard_passthrough"))
+        self.export_btn.setText(self.translate("export"))
+        self.debug_close_btn.setText(self.translate("close_settings"))
+        self.launcher_close_btn.setText(self.translate("close_settings"))
+        self.timing_btn.setToolTip(self.translate("original_timing"))
+        if self.macro_select.count() and self.macro_select.itemData(0) is None:
+            self.macro_select.setItemText(0, self.translate("macros"))
+        self.refresh_target_select()
+        self.sync_history_list()
 
     def connect_to_ip(self, ip):
         if ip:
-            output = self.run_adb(["connect", ip])
-            if "connected" in output.lower():
-                self.add_connection(ip)
-                self.current_device_ip = ip
-                self.show_notification(self.translate("connection_success"), f"{self.translate('connection_success')} {ip}")
-            else:
-                self.show_notification(self.translate("connection_error"), f"{self.translate('connection_error')} {ip}")
-            self.check_connection_status()
+            self.adb_executor.submit(["connect", ip], lambda output: self.on_connect_result(ip, output), timeout=20)
+
+    def on_connect_result(self, ip, output):
+        if "connected" in output.lower():
+            self.add_connection(ip)
+            self.current_device_ip = ip
+            self.device_registry.reset(ip)
+            self.text_injector.forget(ip)
+            if self.screen_preview.running:
+                self.screen_preview.start(device_serial(ip))
+            self.show_notification("connection_success", f"{self.translate('connection_success')} {ip}")
+        else:
+            self.show_notification("connection_error", f"{self.translate('connection_error')} {ip}")
+        self.check_connection_status()
 
     def disconnect_device(self):
         if self.current_device_ip:
-            self.run_adb(["disconnect", self.current_device_ip])
-            self.show_notification(self.translate("disconnected"), f"{self.translate('disconnected')} {self.current_device_ip}")
+            ip = self.current_device_ip
             self.current_device_ip = None
-            self.check_connection_status()
+            self.key_pipeline.clear()
+            self.input_executor.cancel_all()
+            self.device_registry.reset(ip)
+            self.adb_executor.submit(["disconnect", ip], lambda output: self.on_disconnect_result(ip))
+
+    def on_disconnect_result(self, ip):
+        self.show_notification("disconnected", f"{self.translate('disconnected')} {ip}")
+        self.check_connection_status()
+
+    def on_page_changed(self, index):
+        if index != 0:
+            self.passthrough_btn.setChecked(False)
 
     def open_settings_overlay(self):
         self.stack.setCurrentIndex(1)
 
     def close_settings_overlay(self):
+        self.debug_timer.stop()
         self.stack.setCurrentIndex(0)
 
     class ShapeWidget(QFrame):
@@ -352,16 +2927,32 @@ class AndroidTVRemote(QWidget):
                 path.addRoundedRect(rect, self.radius, self.radius)
                 painter.drawPath(path)
 
+    class PreviewWidget(QFrame):
+        def __init__(self, parent=None):
+            super().__init__(parent)
+            self.image = None
+
+        def set_image(self, image):
+            self.image = image
+            self.update()
+
+        def paintEvent(self, event):
+            super().paintEvent(event)
+            if self.image is None:
+                return
+            painter = QPainter(self)
+            painter.drawImage((self.width() - self.image.width()) // 2, (self.height() - self.image.height()) // 2, self.image)
+
     def build_controls(self):
         layout = QVBoxLayout()
 
         power_btn = self.make_button("⏻")
         power_btn.clicked.connect(self.send_power_signal)
 
-        up = self.make_button("↑")
-        down = self.make_button("↓")
-        left = self.make_button("←")
-        right = self.make_button("→")
+        up = self.make_button("↑", repeat=True)
+        down = self.make_button("↓", repeat=True)
+        left = self.make_button("←", repeat=True)
+        right = self.make_button("→", repeat=True)
         ok = QPushButton("")
         ok.setFixedSize(80, 80)
         ok.setStyleSheet("""
@@ -408,8 +2999,8 @@ class AndroidTVRemote(QWidget):
         row1.addWidget(home_btn)
         row1.setAlignment(Qt.AlignCenter)
 
-        vol_up = self.make_button("+")
-        vol_down = self.make_button("-")
+        vol_up = self.make_button("+", repeat=True)
+        vol_down = self.make_button("-", repeat=True)
         vol_up.clicked.connect(self.send_volume_up_signal)
         vol_down.clicked.connect(self.send_volume_down_signal)
 
@@ -431,9 +3022,89 @@ class AndroidTVRemote(QWidget):
 
         return layout
 
-    def make_button(self, label, size=23):
+    def build_macro_controls(self):
+        small_button_style = "background-color: #222; padding: 6px; font-size: 14px; color: white; border: none;"
+
+        self.record_btn = QPushButton("●")
+        self.record_btn.setFixedSize(32, 32)
+        self.record_btn.setCheckable(True)
+        self.record_btn.setStyleSheet(small_button_style)
+        self.record_btn.toggled.connect(self.toggle_macro_recording)
+
+        self.macro_select = QComboBox()
+        self.macro_select.setStyleSheet("padding: 6px; font-size: 13px; background-color: #222; color: #ccc; border: none;")
+        self.refresh_macro_select()
+
+        self.timing_btn = QPushButton("⏱")
+        self.timing_btn.setFixedSize(32, 32)
+        self.timing_btn.setCheckable(True)
+        self.timing_btn.setToolTip(self.translate("original_timing"))
+        self.timing_btn.setStyleSheet(small_button_style)
+
+        play_btn = QPushButton("▶")
+        play_btn.setFixedSize(32, 32)
+        play_btn.setStyleSheet(small_button_style)
+        play_btn.clicked.connect(self.play_macro)
+
+        layout = QHBoxLayout()
+        layout.addWidget(self.record_btn)
+        layout.addWidget(self.macro_select, 1)
+        layout.addWidget(self.timing_btn)
+        layout.addWidget(play_btn)
+        return layout
+
+    def refresh_macro_select(self):
+        self.macro_select.clear()
+        if not self.macro_recorder.macros:
+            self.macro_select.addItem(self.translate("macros"), None)
+        for name in self.macro_recorder.macros:
+            self.macro_select.addItem(name, name)
+
+    def toggle_macro_recording(self, recording):
+        if recording:
+            self.record_btn.setStyleSheet("background-color: #222; padding: 6px; font-size: 14px; color: red; border: none;")
+            self.macro_recorder.start()
+            return
+        self.record_btn.setStyleSheet("background-color: #222; padding: 6px; font-size: 14px; color: white; border: none;")
+        if not self.macro_recorder.steps:
+            self.macro_recorder.stop()
+            return
+        name, accepted = QInputDialog.getText(self, self.translate("macros"), self.translate("macro_name"), text=f"Macro {len(self.macro_recorder.macros) + 1}")
+        name = name.strip() if accepted else ""
+        self.macro_recorder.stop(name or None)
+        self.refresh_macro_select()
+        if name:
+            self.macro_select.setCurrentIndex(self.macro_select.findData(name))
+
+    def play_macro(self):
+        name = self.macro_select.currentData()
+        command, duration = self.macro_recorder.compile(name, self.timing_btn.isChecked())
+        if command:
+            self.input_executor.submit_shell(command, timeout=duration + 10)
+
+    def toggle_preview(self, enabled):
+        if enabled:
+            self.setFixedSize(300, 600 + PREVIEW_HEIGHT + 8)
+            self.preview_view.show()
+            self.screen_preview.start(device_serial(self.current_device_ip) if self.current_device_ip else None)
+        else:
+            self.screen_preview.stop()
+            self.preview_view.hide()
+            self.preview_view.set_image(None)
+            self.setFixedSize(300, 600)
+
+    def on_preview_frame(self, image):
+        self.preview_view.set_image(image)
+        self.screen_preview.frame_shown()
+
+    def make_button(self, label, size=23, repeat=False):
         btn = QPushButton(label)
         btn.setFixedSize(size + 23, size + 23)
+        if repeat:
+            btn.setAutoRepeat(True)
+            btn.setAutoRepeatDelay(KEY_REPEAT_DELAY_MS)
+            btn.setAutoRepeatInterval(KEY_REPEAT_INTERVAL_MS)
+            self.repeat_buttons.append(btn)
         
         btn.setStyleSheet("""
             QPushButton {
@@ -454,25 +3125,50 @@ class AndroidTVRemote(QWidget):
         """)
         return btn
 
-    def run_adb(self, args):
-        adb_path = os.path.join(os.path.dirname(__file__), "platform-tools", "adb.exe")
-        try:
-            result = subprocess.run([adb_path] + args, capture_output=True, text=True, creationflags=subprocess.CREATE_NO_WINDOW)
-            return result.stdout
-        except Exception as e:
-            return str(e)
+    def set_key_repeat_rate(self, interval_ms, delay_ms=KEY_REPEAT_DELAY_MS):
+        for btn in self.repeat_buttons:
+            btn.setAutoRepeatDelay(delay_ms)
+            btn.setAutoRepeatInterval(interval_ms)
+
+    def run_adb(self, args, timeout=None, job=None):
+        if self.current_device_ip and args and args[0] not in ("connect", "disconnect", "devices", "track-devices", "-s"):
+            args = ["-s", device_serial(self.current_device_ip)] + args
+        if self.adb_client is not None:
+            with self.latency.measure("adb.socket"):
+                output = self.adb_client.run(args, timeout)
+            if output is not None:
+                return output
+        return run_adb_process(args, timeout, job, self.latency)
+
+    def run_shell(self, command, timeout=10, target=None):
+        target = target or self.target or self.current_device_ip
+        with self.latency.measure("shell.roundtrip"):
+            if target is None:
+                return self.shell_session.run(command, timeout)
+            return "".join(self.device_registry.run(target, command, timeout).values())
+
+    def latency_report(self):
+        sessions = {"shell": dict(self.shell_session.latency_stats(), restarts=self.shell_session.restarts)}
+        sessions.update(self.device_registry.latency_stats())
+        return {"summary": self.latency.summary(), "sessions": sessions}
 
     def send_text(self):
         text = self.text_input.text().strip()
         if text:
-            self.run_adb(["shell", "input", "text", text.replace(" ", "%s")])
+            target = self.target or self.current_device_ip
+            self.input_executor.submit_call(lambda: self.text_injector.send(text, target), self.on_text_sent)
             self.text_input.clear()
         self.text_input.setFocus()
 
+    def on_text_sent(self, stats):
+        self.latency.record("text.send", stats["seconds"])
+        self.send_btn.setToolTip(f"{stats['chars_per_second']:.0f} chars/s ({stats['method']}, {stats['chunks']} chunks)")
+
     def add_connection(self, ip):
-        if ip and ip not in self.ips["ip_addresses"]:
-            self.ips["ip_addresses"].append(ip)
-            self.save_ips(self.ips)
+        if self.config.add_ip(ip):
+            self.device_registry.add(ip)
+            self.refresh_target_select()
+            self.sync_history_list()
         
     def send_back_signal(self):
         self.send_key_signal(KEYCODE_BACK)
@@ -507,14 +3203,128 @@ class AndroidTVRemote(QWidget):
     def send_ok_key_signal(self):
         self.send_key_signal(KEYCODE_ENTER)
 
-    def show_notification(self, title, message):
-        self.toaster.show_toast(title, message, duration=5, threaded=True)
-
-    def send_key_signal(self, keycode):
-        self.run_adb(["shell", "input", "keyevent", keycode])
+    def show_notification(self, event, message):
+        self.notifier.notify(event, self.translate(event), message)
+
+    def send_key_signal(self, keycode, immediate=False):
+        self.macro_recorder.record(keycode)
+        if keycode in KEY_STATE_FIELDS:
+            self.invalidate_device_state(KEY_STATE_FIELDS[keycode])
+        if self.screen_preview.running:
+            self.screen_preview.poke()
+        self.key_pipeline.push(keycode, immediate)
+
+    def dragEnterEvent(self, event):
+        if event.mimeData().hasUrls():
+            event.acceptProposedAction()
+
+    def dropEvent(self, event):
+        for url in event.mimeData().urls():
+            if url.isLocalFile():
+                self.send_file(url.toLocalFile())
+        event.acceptProposedAction()
+
+    def send_file(self, path):
+        target = self.target or self.current_device_ip
+        if target is None or not os.path.isfile(path):
+            return
+        serials = self.device_registry.resolve(target)
+        for serial in serials:
+            self.transfer_progress[(serial, os.path.basename(path))] = (0, os.path.getsize(path))
+        self.transfers.send(serials, path)
+        self.refresh_transfer_label()
+
+    def on_transfer_progress(self, serial, name, sent, total):
+        if (serial, name) in self.transfer_progress:
+            self.transfer_progress[(serial, name)] = (sent, total)
+            self.refresh_transfer_label()
+
+    def on_transfer_finished(self, serial, name, ok, message):
+        self.transfer_progress.pop((serial, name), None)
+        self.transfer_results.append((serial, name, ok, message))
+        self.refresh_transfer_label()
+        if self.transfer_progress:
+            return
+        failed = [f"{serial}: {message}" for serial, name, ok, message in self.transfer_results if not ok]
+        if failed:
+            self.show_notification("transfer_failed", "\n".join(failed))
+        else:
+            self.show_notification("transfer_done", f"{len(self.transfer_results)} × {name}")
+        self.transfer_results = []
+
+    def refresh_transfer_label(self):
+        if not self.transfer_progress:
+            self.transfer_label.hide()
+            return
+        sent = sum(sent for sent, total in self.transfer_progress.values())
+        total = sum(total for sent, total in self.transfer_progress.values())
+        self.transfer_label.setText(f"⇪ {len(self.transfer_progress)} · {sent * 100 // total if total else 100}%")
+        self.transfer_label.setToolTip("\n".join(f"{name} → {serial}: {sent * 100 // total if total else 100}%" for (serial, name), (sent, total) in self.transfer_progress.items()))
+        self.transfer_label.show()
+
+    def toggle_passthrough(self, enabled):
+        self.passthrough = enabled
+        self.text_input.setEnabled(not enabled)
+        if enabled:
+            target = self.target or self.current_device_ip
+            self.input_executor.submit_call(lambda: self.text_injector.probe(target))
+            self.grabKeyboard()
+        else:
+            self.releaseKeyboard()
+            self.text_input.setFocus()
+
+    def inject_keys(self, keycodes):
+        target = self.target or self.current_device_ip
+        if target is None or target == "all" or target in self.device_registry.groups:
+            return False
+        return self.monkey_backend.send(device_serial(target), keycodes)
+
+    def build_passthrough_text(self, text):
+        capabilities = self.text_injector.capabilities.get(self.target or self.current_device_ip, {"chunk_size": TEXT_CHUNK_MAX, "broadcast": False})
+        return self.text_injector.build_commands(text, capabilities)[0]
+
+    def changeEvent(self, event):
+        if event.type() == QEvent.ActivationChange and self.isActiveWindow():
+            self.refresh_device_state()
+        super().changeEvent(event)
+
+    def keyPressEvent(self, event):
+        if not self.passthrough or event.modifiers() & (Qt.ControlModifier | Qt.AltModifier):
+            super().keyPressEvent(event)
+            return
+        keycode = PASSTHROUGH_KEYS.get(event.key())
+        if keycode is not None:
+            self.send_key_signal(keycode, immediate=True)
+        elif event.text().isprintable() and event.text():
+            if self.screen_preview.running:
+                self.screen_preview.poke()
+            self.key_pipeline.push_text(event.text(), immediate=True)
+        event.accept()
+
+    def keyReleaseEvent(self, event):
+        if not self.passthrough:
+            super().keyReleaseEvent(event)
+            return
+        event.accept()
+
+    def closeEvent(self, event):
+        steps = [self.connection_monitor.stop, self.discovery_engine.stop, self.screen_preview.stop,
+                 self.adb_executor.shutdown, self.input_executor.shutdown, self.shell_session.close,
+                 self.device_registry.close, self.device_state.close, self.config.flush,
+                 self.notifier.close, self.transfers.close]
+        if self.monkey_backend is not None:
+            steps.append(self.monkey_backend.close)
+        if self.adb_client is not None:
+            steps.append(self.adb_client.close)
+        for step in steps:
+            try:
+                step()
+            except Exception as e:
+                print(f"shutdown step {step.__qualname__} failed: {e!r}", file=sys.stderr)
+        super().closeEvent(event)
 
     def create_howto_file(self):
-        howto_file = os.path.expanduser("~") + "/Documents/AndroidTVController/how_to_add_languages.txt"
+        howto_file = os.path.join(CONFIG_DIR, "how_to_add_languages.txt")
         howto_content = "You can add your language in translations.json. Simply copy and paste the structure from the others."
 
         if not os.path.exists(howto_file):
@@ -522,7 +3332,12 @@ class AndroidTVRemote(QWidget):
                 f.write(howto_content)
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in androidtvcli.CLI_COMMANDS:
+        sys.exit(androidtvcli.run_cli(sys.argv[1:], RemoteDaemon))
+    profiler = StartupProfiler("--profile-startup" in sys.argv)
+    profiler.mark("imports")
     app = QApplication(sys.argv)
-    window = AndroidTVRemote()
+    profiler.mark("qt application")
+    window = AndroidTVRemote(profiler)
     window.show()
     sys.exit(app.exec_())
\ No newline at end of file
@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('platform-tools', 'platform-tools'), ('icon', 'icon')],
-    hiddenimports=[],
+    hiddenimports=['win10toast'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
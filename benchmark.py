@@ -0,0 +1,361 @@
+import os
+import sys
+import time
+import shlex
+import socket
+import struct
+import hashlib
+import argparse
+import tempfile
+import threading
+import contextlib
+import androidtvcontroller as atv
+
+STUB_ADB = '''import sys
+import time
+
+delay = float(sys.argv[1])
+args = sys.argv[2:]
+if args[:1] == ["-s"]:
+    args = args[2:]
+if args == ["shell"]:
+    for line in sys.stdin:
+        line = line.strip()
+        if line.startswith("echo "):
+            print(line[5:], flush=True)
+        elif line.startswith("getconf"):
+            print(131072, flush=True)
+        elif line:
+            time.sleep(delay)
+elif args[:1] == ["shell"]:
+    time.sleep(delay)
+else:
+    print("device")
+'''
+
+
+def write_stub_adb(directory, delay):
+    script = os.path.join(directory, "stub_adb.py")
+    with open(script, "w") as f:
+        f.write(STUB_ADB)
+    if os.name == "nt":
+        path = os.path.join(directory, "stub_adb.cmd")
+        with open(path, "w") as f:
+            f.write(f'@"{sys.executable}" "{script}" {delay} %*\n')
+    else:
+        path = os.path.join(directory, "stub_adb")
+        with open(path, "w") as f:
+            f.write(f'#!/bin/sh\nexec "{sys.executable}" "{script}" {delay} "$@"\n')
+        os.chmod(path, 0o755)
+    return path
+
+
+class StubAdbServer:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.files = {}
+        self.replies = {}
+        self.requests = []
+        self.shells = []
+        self.server = socket.socket()
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen(64)
+        self.port = self.server.getsockname()[1]
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    def serve(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self.handle, args=(conn,), daemon=True).start()
+
+    def recv_exact(self, conn, size):
+        data = b""
+        while len(data) < size:
+            chunk = conn.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError
+            data += chunk
+        return data
+
+    def reply(self, conn, message, status=b"OKAY"):
+        data = message.encode("utf-8")
+        conn.sendall(status + b"%04x" % len(data) + data)
+
+    def handle(self, conn):
+        serial = None
+        with conn:
+            try:
+                while True:
+                    request = self.recv_exact(conn, int(self.recv_exact(conn, 4), 16)).decode("utf-8")
+                    self.requests.append(request)
+                    if request in self.replies:
+                        status, message = self.replies[request]
+                        self.reply(conn, message, status)
+                        return
+                    if request.startswith("host:transport"):
+                        serial = request[len("host:transport:"):] if request.startswith("host:transport:") else None
+                        conn.sendall(b"OKAY")
+                    elif request == "host:devices":
+                        self.reply(conn, "stub:5555\tdevice\n")
+                        return
+                    elif request.startswith(("host:", "host-serial:")):
+                        self.reply(conn, "device")
+                        return
+                    elif request == "shell,raw:":
+                        conn.sendall(b"OKAY")
+                        self.interactive(conn)
+                        return
+                    elif request == "sync:":
+                        conn.sendall(b"OKAY")
+                        self.sync(conn, self.files.setdefault(serial, {}))
+                        return
+                    elif request.startswith("shell:"):
+                        conn.sendall(b"OKAY")
+                        time.sleep(self.delay)
+                        conn.sendall(self.shell(request[6:], self.files.setdefault(serial, {})).encode("utf-8"))
+                        return
+                    else:
+                        conn.sendall(b"FAIL0007unknown")
+                        return
+            except (ConnectionError, OSError, ValueError):
+                return
+
+    def shell(self, command, files):
+        args = shlex.split(command)
+        if args[:1] == ["md5sum"] and args[1] in files:
+            return f"{hashlib.md5(files[args[1]]).hexdigest()}  {args[1]}\n"
+        if args[:2] == ["pm", "install"]:
+            return "Success\n" if args[-1] in files else "Failure [INSTALL_FAILED_INVALID_URI]\n"
+        return ""
+
+    def sync(self, conn, files):
+        while True:
+            command, length = struct.unpack("<4sI", self.recv_exact(conn, 8))
+            if command != b"SEND":
+                return
+            path = self.recv_exact(conn, length).decode("utf-8").rsplit(",", 1)[0]
+            chunks = []
+            while True:
+                command, length = struct.unpack("<4sI", self.recv_exact(conn, 8))
+                if command != b"DATA":
+                    break
+                chunks.append(self.recv_exact(conn, length))
+            files[path] = b"".join(chunks)
+            conn.sendall(b"OKAY" + struct.pack("<I", 0))
+
+    def interactive(self, conn):
+        self.shells.append(conn)
+        for line in conn.makefile("r", encoding="utf-8"):
+            line = line.strip()
+            if line == "exit":
+                return
+            if line.startswith("echo "):
+                conn.sendall((line[5:] + "\n").encode("utf-8"))
+            elif line.startswith("getconf"):
+                conn.sendall(b"131072\n")
+            elif line:
+                time.sleep(self.delay)
+
+    def drop_shells(self):
+        for conn in self.shells:
+            with contextlib.suppress(OSError):
+                conn.shutdown(socket.SHUT_RDWR)
+        self.shells = []
+
+    def close(self):
+        self.server.close()
+
+
+class StubMonkeyServer:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.server = socket.socket()
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen(4)
+        self.address = self.server.getsockname()
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    def serve(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self.handle, args=(conn,), daemon=True).start()
+
+    def handle(self, conn):
+        with conn:
+            for line in conn.makefile("r", encoding="utf-8"):
+                if line.startswith("getvar"):
+                    conn.sendall(b"OK:30\n")
+                elif line.startswith("press "):
+                    time.sleep(self.delay)
+                    conn.sendall(b"OK\n")
+                else:
+                    conn.sendall(b"ERROR\n")
+
+    def close(self):
+        self.server.close()
+
+
+def bench_keys(recorder, name, send, count):
+    for _ in range(count):
+        with recorder.measure(name):
+            send(atv.KEYCODE_DPAD_DOWN)
+
+
+def expect(actual, expected, what):
+    if actual != expected:
+        raise AssertionError(f"{what}: expected {expected!r}, got {actual!r}")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def check_adb_server_client():
+    server = StubAdbServer()
+    client = atv.AdbServerClient(port=server.port, timeout=2)
+    server.replies["host:devices"] = (b"OKAY", "stub:5555\tdevice\n10.0.0.8:5555\toffline\nemulator-5554\tunauthorized\n")
+    expect(client.devices(), {"stub:5555": "device", "10.0.0.8:5555": "offline", "emulator-5554": "unauthorized"}, "host:devices")
+    expect(client.run(["devices"]).splitlines()[0], "List of devices attached", "adb devices header")
+    expect(client.run(["-s", "stub:5555", "get-state"]), "device", "get-state")
+    expect(server.requests[-1], "host-serial:stub:5555:get-state", "get-state request")
+    server.replies["host:connect:10.0.0.9:5555"] = (b"OKAY", "connected to 10.0.0.9:5555")
+    expect(client.run(["connect", "10.0.0.9"]), "connected to 10.0.0.9:5555", "connect")
+    server.replies["host:disconnect:10.0.0.7:5555"] = (b"FAIL", "no such device '10.0.0.7:5555'")
+    expect(client.run(["disconnect", "10.0.0.7"]), "no such device '10.0.0.7:5555'", "FAIL reply")
+    try:
+        client.query("host:disconnect:10.0.0.7:5555")
+        raise AssertionError("FAIL reply: query did not raise")
+    except ConnectionError as e:
+        expect(str(e), "no such device '10.0.0.7:5555'", "FAIL message")
+    expect(atv.AdbServerClient(port=free_port(), timeout=2).run(["devices"]), None, "refused connection")
+
+    session = client.session("stub:5555")
+    expect(session.run("echo one"), "one\n", "first shell command")
+    expect(session.run("echo two"), "two\n", "second shell command")
+    expect(server.requests.count("shell,raw:"), 1, "shell sessions opened for two commands")
+    server.drop_shells()
+    deadline = time.monotonic() + 2
+    while not session.eof and time.monotonic() < deadline:
+        time.sleep(0.01)
+    expect(session.run("echo three"), "three\n", "command after the server closed the shell")
+    expect(session.restarts, 1, "session restarts after EOF")
+    expect(session.run("exit"), "adb shell session closed", "command that closes the shell")
+    expect(session.run("echo four"), "four\n", "command after exit")
+    expect(server.requests.count("shell,raw:"), 3, "shell sessions opened in total")
+    client.close()
+    server.close()
+
+
+def check_discovery():
+    listening = ["127.0.0.1", "127.0.0.3"]
+    listeners = [socket.socket()]
+    listeners[0].bind((listening[0], 0))
+    port = listeners[0].getsockname()[1]
+    for host in listening[1:]:
+        listener = socket.socket()
+        listener.bind((host, port))
+        listeners.append(listener)
+    for listener in listeners:
+        listener.listen(8)
+    found = []
+    finished = threading.Event()
+    engine = atv.DiscoveryEngine(port=port, timeout=1.0)
+    engine.device_found.connect(lambda address, source: found.append((address, source)), atv.Qt.DirectConnection)
+    engine.discovery_finished.connect(finished.set, atv.Qt.DirectConnection)
+    try:
+        expect(engine.discover(hosts=[f"127.0.0.{index}" for index in range(1, 7)]), True, "sweep started")
+        expect(finished.wait(10), True, "sweep finished")
+        expect(sorted(address for address, source in found if source == "scan"), sorted(f"{host}:{port}" for host in listening), "hosts found by the sweep")
+    finally:
+        engine.stop()
+        for listener in listeners:
+            listener.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the remote's adb command paths against stub transports.")
+    parser.add_argument("--keys", type=int, default=50, help="key presses per backend")
+    parser.add_argument("--text-length", type=int, default=2000, help="characters per text send")
+    parser.add_argument("--delay", type=float, default=0.0, help="simulated device time per command, in seconds")
+    parser.add_argument("--transfer-mb", type=int, default=32, help="size of the file pushed to each stub device, in MiB")
+    parser.add_argument("--devices", type=int, default=4, help="stub devices to push to in parallel")
+    parser.add_argument("--monkey-delay", type=float, default=0.0, help="simulated device time per monkey key press, in seconds")
+    parser.add_argument("--export", help="write the raw samples and summary to this JSON file")
+    parser.add_argument("--check", action="store_true", help="check the adb server client and the discovery sweep against local stubs instead of timing them")
+    options = parser.parse_args()
+
+    if options.check:
+        check_adb_server_client()
+        check_discovery()
+        print("checks passed")
+        return
+
+    recorder = atv.LatencyRecorder(size=max(options.keys, 1) * 4)
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["ANDROIDTVCONTROLLER_ADB"] = write_stub_adb(directory, options.delay)
+
+        bench_keys(recorder, "spawn.key", lambda keycode: atv.run_adb_process(["shell", "input", "keyevent", keycode]), options.keys)
+
+        session = atv.AdbShellSession()
+        session.run("true")
+        bench_keys(recorder, "session.key", lambda keycode: session.run(f"input keyevent {keycode}"), options.keys)
+        with recorder.measure("session.burst"):
+            session.run("input keyevent " + " ".join([atv.KEYCODE_DPAD_DOWN] * options.keys))
+
+        injector = atv.TextInjector(lambda command, target=None: session.run(command))
+        text = ("The quick brown fox & it's (lazy) dog; " * (options.text_length // 39 + 1))[:options.text_length]
+        stats = injector.send(text)
+        recorder.record("session.text", stats["seconds"])
+        session.close()
+
+        server = StubAdbServer(options.delay)
+        client = atv.AdbServerClient(port=server.port)
+        client.run(["shell", "true"])
+        bench_keys(recorder, "socket.key", lambda keycode: client.run(["shell", "input", "keyevent", keycode]), options.keys)
+        socket_stats = atv.TextInjector(lambda command, target=None: client.session().run(command)).send(text)
+        recorder.record("socket.text", socket_stats["seconds"])
+
+        payload = os.path.join(directory, "payload.bin")
+        with open(payload, "wb") as f:
+            f.write(os.urandom(options.transfer_mb * 1024 * 1024))
+        transfers = atv.TransferManager(client, recorder=recorder)
+        serials = [f"stub{index}:5555" for index in range(options.devices)]
+        with recorder.measure("transfer.fanout"):
+            results = [future.result() for future in transfers.send(serials, payload)]
+        with recorder.measure("transfer.skip"):
+            results += [future.result() for future in transfers.send(serials, payload)]
+        transfers.close()
+        client.close()
+        server.close()
+
+        monkey = StubMonkeyServer(options.monkey_delay)
+        backend = atv.MonkeyInputBackend(address=monkey.address)
+        backend.start("stub")
+        bench_keys(recorder, "monkey.key", lambda keycode: backend.send("stub", [keycode]), options.keys)
+        with recorder.measure("monkey.burst"):
+            backend.send("stub", [atv.KEYCODE_DPAD_DOWN] * options.keys)
+        backend.close()
+        monkey.close()
+
+    print(recorder.format_summary())
+    print(f"text: {stats['chars_per_second']:.0f} chars/s over the process session, {socket_stats['chars_per_second']:.0f} chars/s over the socket")
+    fanout = recorder.summary()["transfer.fanout"]["last_ms"]
+    print(f"transfer: {options.transfer_mb * options.devices / (fanout / 1000):.0f} MiB/s to {options.devices} devices, {sum(results)}/{len(results)} transfers ok")
+    if options.export:
+        recorder.export(os.path.abspath(options.export))
+
+
+if __name__ == "__main__":
+    main()